@@ -0,0 +1,41 @@
+"""payment_history_indexes
+
+Revision ID: 403f0729167b
+Revises: 3f01ca0680a2
+Create Date: 2026-10-17 19:04:54.710634
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '403f0729167b'
+down_revision = '3f01ca0680a2'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns) on payment backing the keyset pages of the payment history
+INDEXES = [
+    ("ix_payment_borrower_id_due_date", ["borrower_id", "due_date", "payment_id"]),
+    ("ix_payment_loan_id_due_date", ["loan_id", "due_date", "payment_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "payment",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="payment", postgresql_concurrently=True, if_exists=True)
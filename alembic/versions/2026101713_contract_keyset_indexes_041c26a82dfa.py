@@ -0,0 +1,42 @@
+"""contract_keyset_indexes
+
+Revision ID: 041c26a82dfa
+Revises: 5f089d5b7fbb
+Create Date: 2026-10-17 19:13:35.337057
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '041c26a82dfa'
+down_revision = '5f089d5b7fbb'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns) on contract backing the keyset pages of the contract listings
+INDEXES = [
+    ("ix_contract_date_signed_contract_id", ["date_signed", "contract_id"]),
+    ("ix_contract_borrower_id_date_signed", ["borrower_id", "date_signed", "contract_id"]),
+    ("ix_contract_investor_id_date_signed", ["investor_id", "date_signed", "contract_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "contract",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="contract", postgresql_concurrently=True, if_exists=True)
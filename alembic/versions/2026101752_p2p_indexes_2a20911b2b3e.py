@@ -0,0 +1,72 @@
+"""p2p_indexes
+
+Revision ID: 2a20911b2b3e
+Revises: 7f7f5ff6fc32
+Create Date: 2026-10-17 18:52:48.718610
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a20911b2b3e'
+down_revision = '7f7f5ff6fc32'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) of plain indexes on foreign keys and status filters
+INDEXES = [
+    ("ix_borrower_user_id", "borrower", ["user_id"]),
+    ("ix_investor_user_id", "investor", ["user_id"]),
+    ("ix_risk_profile_borrower_id", "risk_profile", ["borrower_id"]),
+    ("ix_loan_borrower_id", "loan", ["borrower_id"]),
+    ("ix_loan_status", "loan", ["status"]),
+    ("ix_loan_create_time_loan_id", "loan", ["create_time", "loan_id"]),
+    ("ix_investment_loan_id", "investment", ["loan_id"]),
+    ("ix_investment_investor_id", "investment", ["investor_id"]),
+    ("ix_contract_loan_id", "contract", ["loan_id"]),
+    ("ix_contract_investor_id", "contract", ["investor_id"]),
+    ("ix_contract_borrower_id", "contract", ["borrower_id"]),
+    ("ix_contract_status", "contract", ["status"]),
+    ("ix_payment_loan_id", "payment", ["loan_id"]),
+    ("ix_payment_borrower_id", "payment", ["borrower_id"]),
+    ("ix_payment_status", "payment", ["status"]),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block,
+    # it does not lock the tables against writes on a live database
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.create_index(
+            "ix_payment_investor_payout_pending",
+            "payment",
+            ["status", "status_payment_investor"],
+            unique=False,
+            postgresql_where=sa.text("status_payment_investor = 'pending'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payment_investor_payout_pending",
+            table_name="payment",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
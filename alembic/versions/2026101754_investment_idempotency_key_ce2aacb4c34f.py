@@ -0,0 +1,40 @@
+"""investment_idempotency_key
+
+Revision ID: ce2aacb4c34f
+Revises: 2a20911b2b3e
+Create Date: 2026-10-17 18:54:49.302976
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ce2aacb4c34f'
+down_revision = '2a20911b2b3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('investment', sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_investment_investor_idempotency_key",
+            "investment",
+            ["investor_id", "idempotency_key"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_investment_investor_idempotency_key",
+            table_name="investment",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('investment', 'idempotency_key')
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api import api_messages
-from app.api.endpoints import loan, investment, payments, contracts, externals
+from app.api.endpoints import loan, investment, payments, contracts, externals, metrics
 
 
 api_router = APIRouter(
@@ -35,3 +35,4 @@ api_router.include_router(investment.router, tags=["investments"])
 api_router.include_router(payments.router, tags=["payments"])
 api_router.include_router(contracts.router, tags=["contracts"])
 api_router.include_router(externals.router, tags=["externals"])
+api_router.include_router(metrics.router, tags=["metrics"])
@@ -1,17 +1,34 @@
+import time
 from collections.abc import AsyncGenerator
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException, status
+import httpx
+import jwt
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core import database_session
-import requests
+from app.api.streaming import wants_ndjson
+from app.core import database_session, http_client, security
+from app.helpers.cache import SingleFlight, TTLCache
+from app.services.identity import IdentityContext, IdentityCRUD
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/access-token")
-SERVICE_URL = get_settings().security.microservice_p2p_url.get_secret_value()
+
+# Resolved `/users/me` profiles keyed by access token
+_USER_CACHE = TTLCache(
+    max_size=get_settings().security.auth_cache_max_size,
+    ttl=get_settings().security.auth_cache_ttl_secs,
+)
+# Tokens recently rejected by the auth microservice, with the rejection
+_AUTH_FAILURE_CACHE = TTLCache(
+    max_size=get_settings().security.auth_cache_max_size,
+    ttl=get_settings().security.auth_failure_cache_ttl_secs,
+)
+# Concurrent requests with the same token share one in-flight lookup
+_AUTH_LOOKUPS = SingleFlight()
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -19,21 +36,76 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-):
+async def get_list_session(request: Request) -> AsyncGenerator[Optional[AsyncSession], None]:
+    """Session for list routes with opt-in NDJSON: a stream opens its own, so it gets None."""
+    if wants_ndjson(request):
+        yield None
+        return
+    async with database_session.get_async_session() as session:
+        yield session
+
+
+async def _fetch_remote_user(token: str) -> dict:
+    client = http_client.get_http_client(http_client.UPSTREAM_AUTH)
+    response = await client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    if response.status_code >= 500 or response.status_code == 429:
+        raise HTTPException(status_code=503, detail="Authentication service unavailable")
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Token is invalid or expired")
+
+    return response.json()
+
+
+async def _resolve_remote_user(token: str, expires_at: int) -> dict:
     try:
-        response = requests.get(f"{SERVICE_URL}/users/me", headers={"Authorization": f"Bearer {token}"})
-        if response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Token is invalid or expired")
-        
-        user_info = response.json()
-        return user_info
+        user_info = await _fetch_remote_user(token)
+    except HTTPException as e:
+        _USER_CACHE.pop(token)
+        # only a rejection says something about the token, an outage does not
+        if e.status_code < 500:
+            _AUTH_FAILURE_CACHE.set(token, e)
+        raise
+    except httpx.TransportError as e:
+        # unreachable after retries, or circuit open: fail fast without logging the user out
+        print(e)
+        raise HTTPException(status_code=503, detail="Authentication service unavailable")
     except Exception as e:
         print(e)
         raise HTTPException(status_code=401, detail="Failed to verify token")
 
+    # never keep a profile cached past the token expiration
+    _USER_CACHE.set(token, user_info, ttl=min(_USER_CACHE.ttl, expires_at - time.time()))
+    return user_info
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = security.decode_access_token(token)
+    except jwt.InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=f"Token invalid: {e}")
+
+    failure = _AUTH_FAILURE_CACHE.get(token)
+    if failure is not None:
+        raise HTTPException(status_code=failure.status_code, detail=failure.detail)
+
+    revocation_check = get_settings().security.auth_remote_revocation_check
+    if not revocation_check:
+        user_info = _USER_CACHE.get(token)
+        if user_info is not None:
+            return user_info
+
+    return await _AUTH_LOOKUPS.do(token, lambda: _resolve_remote_user(token, payload["exp"]))
+
 async def admin_required(current_user = Depends(get_current_user)):
     if not current_user["is_admin"]:
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_identity(
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> IdentityContext:
+    return await IdentityCRUD.from_user(db, current_user)
@@ -1,27 +1,41 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_session, get_current_user, admin_required
+from app.api.deps import get_identity, get_list_session, get_session, get_current_user, admin_required
+from app.api.serialization import json_list_response
+from app.api.streaming import ndjson_response, wants_ndjson
 from app.models import User
+from app.schemas.requests import ContractListParams
 from app.schemas.responses import ContractResponse
 
 from app.services.crud_contracts import ContractCRUD
+from app.services.identity import IdentityContext
 
 
 router = APIRouter()
 
-@router.get("/contracts", response_model=List[ContractResponse], description="List all contracts")
+@router.get("/contracts", response_model=List[ContractResponse], description="List all contracts, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page. Send `Accept: application/x-ndjson` to stream every contract, one per line")
 async def list_all_contracts(
-    db: AsyncSession = Depends(get_session),
+    request: Request,
+    params: ContractListParams = Depends(),
+    db: Optional[AsyncSession] = Depends(get_list_session),
     current_user: User = Depends(admin_required),
 ):
-    return await ContractCRUD.get_all_contracts(db)
+    if wants_ndjson(request):
+        return ndjson_response(ContractCRUD.stream_all_contracts)
+    page = await ContractCRUD.get_all_contracts(db, params)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return json_list_response(ContractResponse, page.items, headers)
 
-@router.get("/contracts/user", response_model=List[ContractResponse], description="List contracts of the current user")
+@router.get("/contracts/user", response_model=List[ContractResponse], description="List contracts of the current user as borrower or investor, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page")
 async def list_user_contracts(
+    params: ContractListParams = Depends(),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     db: AsyncSession = Depends(get_session)
 ):
-    return await ContractCRUD.get_user_contracts(db, current_user)
\ No newline at end of file
+    page = await ContractCRUD.get_user_contracts(db, current_user, identity, params)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return json_list_response(ContractResponse, page.items, headers)
\ No newline at end of file
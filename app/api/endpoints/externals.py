@@ -1,75 +1,63 @@
-from fastapi import APIRouter, Request
-from app.schemas.requests import RSAEncryptRequest, RSADecryptRequest, ChatBotRequest
-import requests
+from fastapi import APIRouter, Path, Request
+from fastapi.concurrency import run_in_threadpool
+from app.schemas.requests import RSAEncryptRequest, RSAEncryptBatchRequest, RSADecryptRequest, ChatBotRequest, STOCK_SYMBOL_PATTERN, StockSummaryBatchRequest
 from fastapi import HTTPException
-from app.core.config import get_settings
+from app.helpers import rsa
+from app.api.streaming import sse_response
+from app.services.chatbot import ChatBot
+from app.services.stock_summary import StockSummaryCache
 
 
 router = APIRouter()
 
-@router.post("/rsa/encrypt", description="Encrypt RSA keys")
+# RSA-OAEP (SHA-256) in-process; key parsing and the RSA math run in the thread pool
+@router.post("/rsa/encrypt", description="Encrypt a message with an RSA public key (OAEP, SHA-256), returned in base64")
 async def generate_rsa_keys(request: RSAEncryptRequest):
     try:
-        response = requests.post(
-            "https://5a7udyuiimjx3rngjs7lp4dxee0phmbl.lambda-url.us-east-1.on.aws/rsa/encrypt",
-            json=request.dict()
-        )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-    return {"status": "Request sent", "response": response.json()}
-
-
-@router.post("/rsa/decrypt", description="decrypt RSA keys")
-async def generate_rsa_keys(request: RSADecryptRequest):
+        message = await run_in_threadpool(rsa.encrypt, request.message, request.public_key)
+    except rsa.RSAError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "Request sent", "response": {"message": message}}
+
+
+@router.post("/rsa/encrypt/batch", description="Encrypt many messages with one RSA public key, returned in base64 in the same order")
+async def encrypt_rsa_batch(request: RSAEncryptBatchRequest):
+    try:
+        messages = await run_in_threadpool(rsa.encrypt_many, request.messages, request.public_key)
+    except rsa.RSAError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "Request sent", "response": {"messages": messages}}
+
+
+@router.post("/rsa/decrypt", description="Decrypt a base64 message produced by /rsa/encrypt with the matching RSA private key")
+async def decrypt_rsa_message(request: RSADecryptRequest):
     try:
-        response = requests.post(
-            "https://5a7udyuiimjx3rngjs7lp4dxee0phmbl.lambda-url.us-east-1.on.aws/rsa/decrypt",
-            json=request.dict()
-        )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-    return {"status": "Request sent", "response": response.json()}
+        message = await run_in_threadpool(rsa.decrypt, request.message, request.private_key)
+    except rsa.RSAError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "Request sent", "response": {"message": message}}
 
 
 @router.post("/bot", description="Send message to bot")
 async def send_message_to_bot(request: ChatBotRequest):
-    apiKey = get_settings().security.external_api_key.get_secret_value()
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {apiKey}"
-    } 
-    payload = {
-        "model": "gpt-3.5-turbo-instruct",
-        "prompt": request.prompt,
-        "max_tokens": 2048,
-        "temperature": 0.5
-    }
-    try:
-        response = requests.post(
-            "https://api.openai.com/v1/completions",
-            headers=headers,
-            json=payload
-        )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-    except requests.exceptions.RequestException as e:
-        print (e)
-        raise HTTPException(status_code=500, detail=str(e))
-    
-    return {"status": "Request sent", "response": response.json()}
-
-@router.get("/stocks/stock-summary/{symbol}", description="Get stock data")
-async def get_stock_data(request: Request, symbol: str):
-    try:
-        url = f"https://stock-api-f7tht.ondigitalocean.app/api/stocks/stock-summary/{symbol}"
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-    except requests.exceptions.RequestException as e:
-        print(e)
-        raise HTTPException(status_code=500, detail=str(e))
-    
-    return {"status": "Request sent", "response": response.json()}
\ No newline at end of file
+    return {"status": "Request sent", "response": await ChatBot.complete(request)}
+
+@router.post("/bot/stream", description="Send message to bot and receive the completion as server-sent events, one `data: {\"text\": ...}` event per chunk and a final `done` event")
+async def stream_message_to_bot(request: ChatBotRequest):
+    return sse_response(await ChatBot.open_stream(request))
+
+@router.get("/stocks/stats", description="Stock summary cache hit ratio and upstream latency")
+async def get_stock_stats():
+    return StockSummaryCache.stats()
+
+@router.post("/stocks/stock-summary/batch", description="Get stock data for many symbols, fetched concurrently")
+async def get_stock_data_batch(request: StockSummaryBatchRequest):
+    summaries, errors = await StockSummaryCache.get_summaries(request.symbols)
+    return {"status": "Request sent", "response": summaries, "errors": errors}
+
+@router.get("/stocks/stock-summary/{symbol}", description="Get stock data, cached for a few seconds and refreshed in the background")
+async def get_stock_data(request: Request, symbol: str = Path(pattern=STOCK_SYMBOL_PATTERN)):
+    return {"status": "Request sent", "response": await StockSummaryCache.get_summary(symbol)}
@@ -1,54 +1,80 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Request, status
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import admin_required, get_session, get_current_user
+from app.api.deps import admin_required, get_identity, get_list_session, get_session, get_current_user
+from app.api.serialization import json_list_response
+from app.api.streaming import ndjson_response, wants_ndjson
 from app.models import User
 
-from app.schemas.requests import InvestmentRequest
-from app.schemas.responses import InvestmentResponse, InvestmentResponseDetailed, InvestmentResponsePersonalizated
+from app.schemas.requests import InvestmentListParams, InvestmentRequest
+from app.schemas.responses import InvestmentResponse, InvestmentResponseDetailed, InvestmentResponsePersonalizated, InvestorPortfolioSummary
 
 from app.services.crud_investment import InvestmentCRUD
+from app.services.identity import IdentityContext
 
 router = APIRouter()
 
-@router.post("/investments", response_model=InvestmentResponse, description="Create a new investment", status_code=status.HTTP_201_CREATED)
+@router.post("/investments", response_model=InvestmentResponse, description="Create a new investment. Retries with the same `Idempotency-Key` header return the original investment", status_code=status.HTTP_201_CREATED)
 async def create_investment(
     investment_in: InvestmentRequest,
+    idempotency_key: Optional[str] = Header(default=None, max_length=64),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     db: AsyncSession = Depends(get_session)
 ) -> InvestmentResponse:
-    return await InvestmentCRUD.create_investment(db, investment_in, current_user)
+    return await InvestmentCRUD.create_investment(db, investment_in, current_user, idempotency_key, identity)
 
 
-@router.get("/investments", response_model=List[InvestmentResponseDetailed], description="List all investments", status_code=status.HTTP_200_OK)
+@router.get("/investments", response_model=List[InvestmentResponseDetailed], description="List all investments. Send `Accept: application/x-ndjson` to stream one investment per line", status_code=status.HTTP_200_OK)
 async def list_investments(
-    db: AsyncSession = Depends(get_session),
+    request: Request,
+    params: InvestmentListParams = Depends(),
+    db: Optional[AsyncSession] = Depends(get_list_session),
     current_user: User = Depends(get_current_user),
 ) -> List[InvestmentResponseDetailed]:
-    return await InvestmentCRUD.list_investments(db)
+    if wants_ndjson(request):
+        return ndjson_response(lambda session: InvestmentCRUD.stream_investments(session, params))
+    return json_list_response(InvestmentResponseDetailed, await InvestmentCRUD.list_investments(db, params))
 
 
 @router.get("/investments/user", response_model=List[InvestmentResponsePersonalizated], description="List investments of a specific user", status_code=status.HTTP_200_OK)
 async def list_user_investments(
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
 ) -> List[InvestmentResponsePersonalizated]:
     current_user_id = current_user["user_id"]
-    return await InvestmentCRUD.list_user_investments(db, current_user_id)
+    return json_list_response(InvestmentResponsePersonalizated, await InvestmentCRUD.list_user_investments(db, current_user_id, identity))
 
-@router.get("/investments/payed", response_model=List[InvestmentResponseDetailed], description="List all payed investments", status_code=status.HTTP_200_OK)
-async def list_investments_payed(
+@router.get("/investments/user/summary", response_model=InvestorPortfolioSummary, description="Portfolio totals of the current user investor, computed in the database", status_code=status.HTTP_200_OK)
+async def get_user_portfolio_summary(
     db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
+) -> InvestorPortfolioSummary:
+    return await InvestmentCRUD.get_user_portfolio_summary(db, current_user["user_id"], identity)
+
+@router.get("/investments/payed", response_model=List[InvestmentResponseDetailed], description="List all payed investments. Send `Accept: application/x-ndjson` to stream one investment per line", status_code=status.HTTP_200_OK)
+async def list_investments_payed(
+    request: Request,
+    params: InvestmentListParams = Depends(),
+    db: Optional[AsyncSession] = Depends(get_list_session),
     current_user: User = Depends(admin_required),
 ) -> List[InvestmentResponseDetailed]:
-    return await InvestmentCRUD.list_investments_payed(db)
+    if wants_ndjson(request):
+        return ndjson_response(lambda session: InvestmentCRUD.stream_investments_payed(session, params))
+    return json_list_response(InvestmentResponseDetailed, await InvestmentCRUD.list_investments_payed(db, params))
 
 
-@router.get("/investments/approved", response_model=List[InvestmentResponseDetailed], description="List all approved investments", status_code=status.HTTP_200_OK)
+@router.get("/investments/approved", response_model=List[InvestmentResponseDetailed], description="List all approved investments. Send `Accept: application/x-ndjson` to stream one investment per line", status_code=status.HTTP_200_OK)
 async def list_investment_status_approved(
-    db: AsyncSession = Depends(get_session),
+    request: Request,
+    params: InvestmentListParams = Depends(),
+    db: Optional[AsyncSession] = Depends(get_list_session),
     current_user: User = Depends(admin_required),
 ) -> List[InvestmentResponseDetailed]:
-    return await InvestmentCRUD.list_investment_status_approved(db)
\ No newline at end of file
+    if wants_ndjson(request):
+        return ndjson_response(lambda session: InvestmentCRUD.stream_investment_status_approved(session, params))
+    return json_list_response(InvestmentResponseDetailed, await InvestmentCRUD.list_investment_status_approved(db, params))
\ No newline at end of file
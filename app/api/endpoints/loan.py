@@ -3,12 +3,14 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.api.deps import admin_required, get_session, get_current_user
+from app.api.deps import admin_required, get_identity, get_session, get_current_user
+from app.api.serialization import json_list_response
 from app.models import User
 
-from app.schemas.requests import LoanRequest, LoanUpdateRequest, UpdateLoanStatusRequest
+from app.schemas.requests import LoanListParams, LoanRequest, LoanUpdateRequest, UpdateLoanStatusRequest
 from app.schemas.responses import LoanResponse, LoanResponsePersonalizated
 
+from app.services.identity import IdentityContext
 from app.services.p2p import LoanCRUD
 
 router = APIRouter()
@@ -23,19 +25,23 @@ def get_p2p(
 async def create_loan(
     loan_in: LoanRequest,
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     db: AsyncSession = Depends(get_session)
 ) -> LoanResponse:
     print(current_user)
     print(loan_in)
-    return await LoanCRUD.create_loan(db, loan_in, current_user)
+    return await LoanCRUD.create_loan(db, loan_in, current_user, identity)
 
 
-@router.get("/loans", response_model=List[LoanResponsePersonalizated], description="List all loans", status_code=status.HTTP_200_OK)
+@router.get("/loans", response_model=List[LoanResponsePersonalizated], description="List loans, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page", status_code=status.HTTP_200_OK)
 async def list_loans(
+    params: LoanListParams = Depends(),
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> List[LoanResponsePersonalizated]:
-    return await LoanCRUD.list_loans(db)
+    page = await LoanCRUD.list_loans(db, params)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return json_list_response(LoanResponsePersonalizated, page.items, headers)
 
 
 @router.put("/loan/{loan_id}", response_model=LoanResponse, description="Update a loan", status_code=status.HTTP_200_OK)
@@ -62,9 +68,10 @@ async def delete_loan(
 async def list_user_loans(
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
 ) -> List[LoanResponse]:
     current_user_id = current_user["user_id"]
-    return await LoanCRUD.list_user_loans(db, current_user_id)
+    return json_list_response(LoanResponse, await LoanCRUD.list_user_loans(db, current_user_id, identity))
 
 @router.put("/loans/status/{loan_id}", response_model=LoanResponse)
 async def update_loan_status(
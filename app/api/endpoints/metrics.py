@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_session, admin_required
+from app.core import database_session
+from app.core.circuit_breaker import breakers_snapshot
+from app.models import User
+from app.schemas.responses import PlatformMetricsResponse
+
+from app.services.metrics import MetricsCRUD
+
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=PlatformMetricsResponse, description="Platform-wide aggregates, maintained incrementally as loans, investments and payments change")
+async def get_platform_metrics(
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(admin_required),
+):
+    return await MetricsCRUD.get_platform_metrics(db)
+
+@router.get("/metrics/upstreams", description="Circuit breaker state of each external dependency (closed, open or half_open)")
+async def get_upstream_metrics(
+    current_user: User = Depends(admin_required),
+):
+    return breakers_snapshot()
+
+@router.get("/metrics/database-pool", description="Connection pool of this worker: checked-out and overflow connections, checkout wait histogram and timeouts")
+async def get_database_pool_metrics(
+    current_user: User = Depends(admin_required),
+):
+    return database_session.pool_snapshot()
@@ -1,31 +1,59 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_session, get_current_user, admin_required
+from app.api.deps import get_identity, get_list_session, get_session, get_current_user, admin_required
+from app.api.serialization import json_list_response
+from app.api.streaming import ndjson_response, wants_ndjson
 from app.models import User
 
-from app.schemas.requests import PaymentUpdateRequest
-from app.schemas.responses import PaymentResponse, PaymentResponseDetailed
+from app.schemas.requests import BULK_MAX_PAYMENT_IDS, PaymentBulkUpdateRequest, PaymentHistoryParams, PaymentUpdateRequest
+from app.schemas.responses import PaymentBulkUpdateResponse, PaymentResponse, PaymentResponseDetailed
 
 from app.services.crud_payments import PaymentCRUD
+from app.services.identity import IdentityContext
 
 router = APIRouter()
 
-@router.get("/payments/user/borrower", response_model=List[PaymentResponse], description="List all payments of the current user borrower")
+@router.get("/payments/user/borrower", response_model=List[PaymentResponse], description="List payments of the current user borrower, oldest due date first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page")
 async def list_user_payments_borrower(
+    params: PaymentHistoryParams = Depends(),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     db: AsyncSession = Depends(get_session)
 ):
-    return await PaymentCRUD.get_user_payments_borrower(db, current_user)
+    page = await PaymentCRUD.get_user_payments_borrower(db, current_user, identity, params)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return json_list_response(PaymentResponse, page.items, headers)
 
-@router.get("/payments/user/investor", response_model=List[PaymentResponse], description="List all payments of the current user investor")
+@router.get("/payments/user/investor", response_model=List[PaymentResponse], description="List payments of the current user investor, oldest due date first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page")
 async def list_user_payments_investor(
+    params: PaymentHistoryParams = Depends(),
     current_user: User = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     db: AsyncSession = Depends(get_session)
 ):
-    return await PaymentCRUD.get_user_payments_investor(db, current_user)
+    page = await PaymentCRUD.get_user_payments_investor(db, current_user, identity, params)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return json_list_response(PaymentResponse, page.items, headers)
+
+# Declaradas antes das rotas com {payment_id}, que também casariam com "bulk"
+@router.patch("/payments/bulk", response_model=PaymentBulkUpdateResponse, description=f"Update the status of up to {BULK_MAX_PAYMENT_IDS} payments, by id or by filter, in one transaction. Reports the outcome of every payment")
+async def bulk_update_payment_status(
+    request: PaymentBulkUpdateRequest,
+    current_user: User = Depends(admin_required),
+    db: AsyncSession = Depends(get_session)
+):
+    return await PaymentCRUD.bulk_update_payment_status(db, request)
+
+@router.patch("/payments/investor/bulk", response_model=PaymentBulkUpdateResponse, description=f"Update the investor payout status of up to {BULK_MAX_PAYMENT_IDS} payments, by id or by filter, in one transaction. Reports the outcome of every payment")
+async def bulk_update_payment_investor_status(
+    request: PaymentBulkUpdateRequest,
+    current_user: User = Depends(admin_required),
+    db: AsyncSession = Depends(get_session)
+):
+    return await PaymentCRUD.bulk_update_payment_investor_status(db, request)
 
 @router.patch("/payments/{payment_id}", response_model=PaymentResponse, description="Update the status of a payment")
 async def update_payment_status(
@@ -46,9 +74,12 @@ async def update_payment_investor_status(
     return await PaymentCRUD.update_payment_investor_status(db, payment_id, payment_update.status)
 
 
-@router.get("/payments/pending-payments", response_model=list[PaymentResponseDetailed])
+@router.get("/payments/pending-payments", response_model=list[PaymentResponseDetailed], description="List payments awaiting the investor payout. Send `Accept: application/x-ndjson` to stream one payment per line")
 async def get_investor_pending_payments(
-    db: AsyncSession = Depends(get_session),
+    request: Request,
+    db: Optional[AsyncSession] = Depends(get_list_session),
     current_user: User = Depends(admin_required)
 ):
-    return await PaymentCRUD.get_investor_pending_payments(db)
\ No newline at end of file
+    if wants_ndjson(request):
+        return ndjson_response(PaymentCRUD.stream_investor_pending_payments)
+    return json_list_response(PaymentResponseDetailed, await PaymentCRUD.get_investor_pending_payments(db))
\ No newline at end of file
@@ -0,0 +1,29 @@
+# Fast path for list endpoints.
+#
+# Services build each list in one `validate_list` call, so the rows are
+# validated once, in bulk, by pydantic-core. Endpoints then return
+# `json_list_response`, which writes the JSON bytes with the same cached
+# TypeAdapter. Returning a Response skips FastAPI's second pass over
+# `response_model` (validate, `serialize` to Python objects, `json.dumps`);
+# `response_model` stays declared on the route for the OpenAPI schema.
+
+
+from collections.abc import Mapping, Sequence
+from typing import Optional
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.helpers.serialization import dump_json_list
+
+
+def json_list_response(
+    model: type[BaseModel],
+    items: Sequence[BaseModel],
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    return Response(
+        content=dump_json_list(model, items),
+        media_type="application/json",
+        headers=headers,
+    )
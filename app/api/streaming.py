@@ -0,0 +1,69 @@
+# Opt-in NDJSON streaming for admin-wide list endpoints, and server-sent
+# events for relaying upstream token streams (`/bot/stream`).
+#
+# With `Accept: application/x-ndjson` rows are read through a server-side
+# cursor (`AsyncSession.stream`) and every record is written as one JSON line
+# as soon as it arrives, so memory stays flat regardless of the table size.
+#
+# The stream owns its session: dependencies with yield are already closed
+# when a StreamingResponse body is iterated.
+
+
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database_session
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    stream: Callable[[AsyncSession], AsyncIterator[BaseModel]],
+) -> StreamingResponse:
+    async def body() -> AsyncIterator[str]:
+        async with database_session.get_async_session() as session:
+            async for item in stream(session):
+                yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def sse_response(texts: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Relay text chunks as `data: {"text": ...}` events, then one `done` event.
+
+    An upstream failure after the response started can no longer change the
+    status code, so it is sent as an `error` event instead.
+    """
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for text in texts:
+                yield sse_event({"text": text})
+        except Exception as e:
+            print(e)
+            yield sse_event({"detail": str(e)}, event="error")
+            return
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        body(),
+        media_type=SSE_MEDIA_TYPE,
+        # no proxy buffering, each event reaches the client as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,31 @@
+# Recompute the platform metrics from scratch and report drift.
+#
+#   python -m app.commands.rebuild_metrics           # rewrite platform_metric
+#   python -m app.commands.rebuild_metrics --check   # only compare, exit 1 on drift
+#
+# Run it once after `alembic upgrade head` on an existing database, so the
+# incremental aggregates start from the current state of the tables.
+
+
+import argparse
+import asyncio
+import sys
+
+from app.core import database_session
+from app.services.metrics import MetricsCRUD
+
+
+async def main(check: bool) -> int:
+    async with database_session.get_async_session() as session:
+        drift = await MetricsCRUD.rebuild(session, apply=not check)
+
+    for name, (stored, computed) in drift.items():
+        print(f"{name}: stored={stored} computed={computed}")
+    print(f"{len(drift)} metric(s) drifted" + ("" if check else ", rewritten"))
+    return 1 if check and drift else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the platform metrics from scratch")
+    parser.add_argument("--check", action="store_true", help="compare only, exit 1 on drift")
+    sys.exit(asyncio.run(main(parser.parse_args().check)))
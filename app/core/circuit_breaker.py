@@ -0,0 +1,185 @@
+# Circuit breaker and bounded retries for outbound HTTP calls.
+#
+# Every upstream client in `app/core/http_client.py` sends through a
+# `ResilientTransport`, so callers keep using plain httpx and get:
+#
+# - retries with full-jitter exponential backoff, bounded by
+#   `http.retry_max_attempts`. Connect errors are always retried (the request
+#   never reached the upstream); timeouts, 5xx and 429 only for idempotent
+#   methods, so a POST is never sent twice;
+# - one `CircuitBreaker` per upstream. After `http.breaker_failure_threshold`
+#   consecutive failed calls the circuit opens and calls fail immediately with
+#   `CircuitOpenError` instead of waiting for a timeout. After
+#   `http.breaker_reset_timeout_secs` a single probe call is let through
+#   (half-open): success closes the circuit, failure opens it again.
+#
+# https://martinfowler.com/bliki/CircuitBreaker.html
+
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from enum import Enum
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """The upstream circuit is open, the call was not attempted."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self.reset()
+
+    def reset(self) -> None:
+        self._state = CircuitState.closed
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.total_failures = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.open and self._timer() - self.opened_at >= self.reset_timeout:
+            return CircuitState.half_open
+        return self._state
+
+    def before_call(self) -> None:
+        """Reserve the call or raise `CircuitOpenError` to fail fast."""
+        state = self.state
+        if state == CircuitState.closed:
+            return
+        if state == CircuitState.half_open and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        self.rejected_calls += 1
+        raise CircuitOpenError(f"Circuit for upstream '{self.name}' is open")
+
+    def record_success(self) -> None:
+        self._state = CircuitState.closed
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if self._probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self._state = CircuitState.open
+            self.opened_at = self._timer()
+        self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "rejected_calls": self.rejected_calls,
+            "retry_in_secs": (
+                max(0.0, round(self.reset_timeout - (self._timer() - self.opened_at), 3))
+                if self._state == CircuitState.open
+                else None
+            ),
+        }
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(upstream)
+    if breaker is None:
+        http = get_settings().http
+        breaker = _BREAKERS[upstream] = CircuitBreaker(
+            upstream, http.breaker_failure_threshold, http.breaker_reset_timeout_secs
+        )
+    return breaker
+
+
+def breakers_snapshot() -> dict[str, dict]:
+    return {name: breaker.snapshot() for name, breaker in sorted(_BREAKERS.items())}
+
+
+def reset_breakers() -> None:
+    _BREAKERS.clear()
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, breaker: CircuitBreaker):
+        http = get_settings().http
+        self._transport = transport
+        self.breaker = breaker
+        self.max_attempts = max(1, http.retry_max_attempts)
+        self.backoff_base = http.retry_backoff_base_secs
+        self.backoff_max = http.retry_backoff_max_secs
+
+    async def _backoff(self, attempt: int) -> None:
+        # full jitter: a random wait in [0, base * 2^attempt], capped
+        await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt)))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before_call()
+        idempotent = request.method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            last_attempt = attempt + 1 >= self.max_attempts
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.ConnectError:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+            except httpx.TransportError:
+                if last_attempt or not idempotent:
+                    self.breaker.record_failure()
+                    raise
+            except BaseException:
+                # cancelled or unexpected: release a half-open probe without judging the upstream
+                self.breaker.release_probe()
+                raise
+            else:
+                if not _is_failure(response):
+                    self.breaker.record_success()
+                    return response
+                if last_attempt or not idempotent:
+                    self.breaker.record_failure()
+                    return response
+                await response.aclose()
+
+            await self._backoff(attempt)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
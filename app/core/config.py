@@ -34,6 +34,71 @@ class Security(BaseModel):
     backend_cors_origins: list[AnyHttpUrl] = []
     microservice_p2p_url: SecretStr
     external_api_key: SecretStr
+    auth_cache_ttl_secs: int = 300
+    auth_cache_max_size: int = 10_000
+    auth_remote_revocation_check: bool = False
+    auth_failure_cache_ttl_secs: int = 5
+    # borrower/investor ids per user. Those rows are written by the auth
+    # service, which cannot invalidate this per-process cache: a role created
+    # or removed there is seen here after at most the matching TTL
+    identity_cache_ttl_secs: int = 60
+    identity_cache_max_size: int = 10_000
+    identity_missing_role_ttl_secs: int = 5
+    rsa_key_cache_max_size: int = 256
+    rsa_key_cache_ttl_secs: int = 3600
+
+class Http(BaseModel):
+    connect_timeout_secs: float = 5.0
+    read_timeout_secs: float = 30.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_secs: float = 30.0
+    # per-upstream cap, falls back to `max_connections`
+    upstream_max_connections: dict[str, int] = {"auth": 50, "openai": 10, "stocks": 20}
+    openai_url: str = "https://api.openai.com/v1"
+    stock_api_url: str = "https://stock-api-f7tht.ondigitalocean.app/api"
+    # attempts per call, including the first; see `app/core/circuit_breaker.py`
+    retry_max_attempts: int = 3
+    retry_backoff_base_secs: float = 0.1
+    retry_backoff_max_secs: float = 1.0
+    # consecutive failed calls that open an upstream circuit, and how long it stays open
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout_secs: float = 30.0
+
+
+class Pagination(BaseModel):
+    default_page_size: int = 50
+    max_page_size: int = 200
+    # rows fetched per round-trip by NDJSON exports
+    stream_yield_per: int = 1000
+
+
+class Stocks(BaseModel):
+    # stock summaries are served from memory while fresh, then served stale
+    # (and refreshed in the background) for `summary_stale_secs` more
+    summary_ttl_secs: float = 30.0
+    summary_stale_secs: float = 300.0
+    summary_cache_max_size: int = 1000
+    # upstream calls in flight per batch request
+    batch_concurrency: int = 8
+
+
+class Bot(BaseModel):
+    # /bot calls in flight per process; past it requests get 503 right away
+    # instead of queueing, so bot traffic cannot hold workers the loan APIs need
+    max_concurrency: int = 8
+
+
+class Jobs(BaseModel):
+    # periodic scan that moves past-due pending installments to "overdue"
+    overdue_scan_enabled: bool = True
+    overdue_scan_interval_secs: float = 3600.0
+    overdue_scan_batch_size: int = 1000
+    # platform metric changes are appended per write transaction and summed
+    # into `platform_metric` this often, see `MetricsCRUD.fold`
+    metrics_fold_enabled: bool = True
+    metrics_fold_interval_secs: float = 5.0
+
 
 class Database(BaseModel):
     hostname: str = "postgres"
@@ -41,11 +106,29 @@ class Database(BaseModel):
     password: SecretStr
     port: int = 5432
     db: str = "postgres"
+    # connection pool per worker process: at most pool_size + max_overflow
+    # connections, so size it against the worker count and Postgres max_connections
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout_secs: float = 30.0
+    pool_recycle_secs: int = 600
+    # a round-trip on every checkout; safe to disable when pool_recycle_secs
+    # is below the server/proxy idle timeout
+    pool_pre_ping: bool = True
+    # asyncpg prepared statements cached per connection; set both to 0 behind
+    # PgBouncer in transaction pooling mode
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
 
 
 class Settings(BaseSettings):
     security: Security
     database: Database
+    http: Http = Http()
+    pagination: Pagination = Pagination()
+    jobs: Jobs = Jobs()
+    stocks: Stocks = Stocks()
+    bot: Bot = Bot()
 
     @computed_field  # type: ignore[misc]
     @property
@@ -4,8 +4,17 @@
 #
 # for pool size configuration:
 # https://docs.sqlalchemy.org/en/20/core/pooling.html#sqlalchemy.pool.Pool
+#
+# Pool settings come from the `Database` settings group. The pool is an
+# `InstrumentedQueuePool`, which records checkout wait times and timeouts so
+# pools can be sized from data, see `pool_snapshot` and `GET /metrics/database-pool`.
+
 
+import bisect
+import time
+from typing import Optional
 
+from sqlalchemy import exc
 from sqlalchemy.engine.url import URL
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -13,18 +22,83 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import Database, get_settings
+
+# upper bounds (ms) of the checkout wait histogram buckets, plus one overflow bucket
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
 
-from app.core.config import get_settings
 
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times every checkout (queue wait, new connection, pre-ping)."""
 
-def new_async_engine(uri: URL) -> AsyncEngine:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.observe_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps the pool; keep counting from where it was
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "max_overflow": self._max_overflow,
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.timeouts,
+            "wait_ms_avg": round(stats.wait_ms_total / stats.checkouts, 3) if stats.checkouts else None,
+            "wait_ms_max": round(stats.wait_ms_max, 3),
+            "wait_ms_histogram": dict(zip(labels, stats.wait_histogram)),
+        }
+
+
+def new_async_engine(uri: URL, database: Optional[Database] = None) -> AsyncEngine:
+    database = database or get_settings().database
     return create_async_engine(
         uri,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30.0,
-        pool_recycle=600,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=database.pool_pre_ping,
+        pool_size=database.pool_size,
+        max_overflow=database.max_overflow,
+        pool_timeout=database.pool_timeout_secs,
+        pool_recycle=database.pool_recycle_secs,
+        connect_args={
+            "statement_cache_size": database.statement_cache_size,
+            "prepared_statement_cache_size": database.prepared_statement_cache_size,
+        },
     )
 
 
@@ -34,3 +108,7 @@ _ASYNC_SESSIONMAKER = async_sessionmaker(_ASYNC_ENGINE, expire_on_commit=False)
 
 def get_async_session() -> AsyncSession:  # pragma: no cover
     return _ASYNC_SESSIONMAKER()
+
+
+def pool_snapshot() -> dict:
+    return _ASYNC_ENGINE.pool.snapshot()
@@ -0,0 +1,78 @@
+# Shared async HTTP clients for every outbound call.
+#
+# Each upstream gets its own httpx.AsyncClient, so keep-alive pools and
+# connection limits are isolated and a slow upstream cannot exhaust the
+# connections of another. Clients are created lazily on first use and closed
+# in the app lifespan, see `app/main.py`.
+#
+# Calls go through a per-upstream circuit breaker with bounded retries, see
+# `app/core/circuit_breaker.py`.
+#
+# https://www.python-httpx.org/advanced/#pool-limit-configuration
+
+
+import httpx
+
+from app.core.circuit_breaker import ResilientTransport, get_breaker, reset_breakers
+from app.core.config import get_settings
+
+UPSTREAM_AUTH = "auth"
+UPSTREAM_OPENAI = "openai"
+UPSTREAM_STOCKS = "stocks"
+
+_CLIENTS: dict[str, httpx.AsyncClient] = {}
+_TRANSPORT: httpx.AsyncBaseTransport | None = None
+
+
+def _upstream_base_url(upstream: str) -> str:
+    settings = get_settings()
+    return {
+        UPSTREAM_AUTH: settings.security.microservice_p2p_url.get_secret_value(),
+        UPSTREAM_OPENAI: settings.http.openai_url,
+        UPSTREAM_STOCKS: settings.http.stock_api_url,
+    }[upstream]
+
+
+def new_async_client(
+    upstream: str, transport: httpx.AsyncBaseTransport | None = None
+) -> httpx.AsyncClient:
+    http = get_settings().http
+    max_connections = http.upstream_max_connections.get(upstream, http.max_connections)
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(http.max_keepalive_connections, max_connections),
+                keepalive_expiry=http.keepalive_expiry_secs,
+            ),
+        )
+    return httpx.AsyncClient(
+        base_url=_upstream_base_url(upstream),
+        timeout=httpx.Timeout(
+            http.read_timeout_secs,
+            connect=http.connect_timeout_secs,
+        ),
+        transport=ResilientTransport(transport, get_breaker(upstream)),
+    )
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    client = _CLIENTS.get(upstream)
+    if client is None or client.is_closed:
+        client = _CLIENTS[upstream] = new_async_client(upstream, _TRANSPORT)
+    return client
+
+
+async def close_http_clients() -> None:
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def set_transport(transport: httpx.AsyncBaseTransport | None) -> None:
+    """Route every upstream through `transport`, e.g. `httpx.MockTransport` in tests."""
+    global _TRANSPORT
+    _TRANSPORT = transport
+    _CLIENTS.clear()
+    reset_breakers()
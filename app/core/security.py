@@ -0,0 +1,24 @@
+# Local verification of access tokens issued by the auth microservice.
+#
+# Tokens are HS256 JWTs signed with the shared `security__jwt_secret_key`,
+# so signature, issuer and expiry can be checked without a network hop.
+#
+# https://pyjwt.readthedocs.io/en/stable/usage.html
+
+
+import jwt
+
+from app.core.config import get_settings
+
+JWT_ALGORITHM = "HS256"
+
+
+def decode_access_token(token: str) -> dict:
+    security = get_settings().security
+    return jwt.decode(
+        token,
+        security.jwt_secret_key.get_secret_value(),
+        algorithms=[JWT_ALGORITHM],
+        issuer=security.jwt_issuer,
+        options={"require": ["exp", "sub"]},
+    )
@@ -0,0 +1,77 @@
+from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple
+
+from app.helpers.p2p_utils import BANK_PROFIT_RATE
+
+
+class AmortizationMethod(str, Enum):
+    price = "price"  # Tabela Price: parcelas constantes, juros concentrados no início
+    sac = "sac"  # Sistema de Amortização Constante: amortização fixa, parcelas decrescentes
+
+
+class Installment(NamedTuple):
+    number: int
+    payment: float
+    principal: float
+    interest: float
+    balance: float
+    bank_share: float
+    investor_share: float
+
+
+@lru_cache(maxsize=1024)
+def build_schedule(
+    amount: float,
+    rate_juros: float,
+    duration: int,
+    method: AmortizationMethod = AmortizationMethod.price,
+) -> tuple[Installment, ...]:
+    """
+    Monta o cronograma completo de amortização de um empréstimo.
+
+    O resultado é memoizado por (amount, rate_juros, duration, method), então
+    empréstimos com o mesmo formato não recalculam a tabela.
+
+    :param amount: Valor do empréstimo.
+    :param rate_juros: Taxa de juros mensal (em porcentagem).
+    :param duration: Duração do empréstimo em meses.
+    :param method: Sistema de amortização (Price ou SAC).
+    :return: Tupla de parcelas com amortização, juros, saldo devedor e a parte
+        dos juros que fica com o banco e com o investidor.
+    """
+    i = rate_juros / 100
+    balance = amount
+
+    if method == AmortizationMethod.price:
+        if i == 0:
+            fixed_payment = amount / duration
+        else:
+            fixed_payment = amount * (i * pow(1 + i, duration)) / (pow(1 + i, duration) - 1)
+
+    installments = []
+    for number in range(1, duration + 1):
+        interest = balance * i
+        if number == duration:
+            # Última parcela quita o saldo, sem resíduo de arredondamento
+            principal = balance
+        elif method == AmortizationMethod.price:
+            principal = fixed_payment - interest
+        else:
+            principal = amount / duration
+
+        balance -= principal
+        bank_share = interest * BANK_PROFIT_RATE
+        installments.append(
+            Installment(
+                number=number,
+                payment=principal + interest,
+                principal=principal,
+                interest=interest,
+                balance=max(balance, 0.0),
+                bank_share=bank_share,
+                investor_share=interest - bank_share,
+            )
+        )
+
+    return tuple(installments)
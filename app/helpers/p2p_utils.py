@@ -1,5 +1,29 @@
+from datetime import datetime
 from math import pow
 
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+# Percentual dos juros totais que fica com o banco
+BANK_PROFIT_RATE = 0.2
+
+# Diferença relativa máxima entre `calculate_profits_batch` e `calculate_profits`
+BATCH_RELATIVE_TOLERANCE = 1e-9
+
+
+def monthly_due_dates(start: datetime, count: int) -> list[datetime]:
+    """
+    Gera as datas de vencimento mensais a partir de `start`.
+
+    Cada data é calculada a partir da data inicial (e não da anterior), então um
+    empréstimo iniciado em 31/01 vence em 29/02, 31/03, 30/04...
+
+    :param start: Data de referência do empréstimo.
+    :param count: Quantidade de parcelas.
+    :return: Lista com a data de vencimento de cada parcela.
+    """
+    return [start + relativedelta(months=n) for n in range(1, count + 1)]
+
 class ProfitCalculator:
     @staticmethod
     def calculate_profits(investment_amount: float, rate_juros: float, duration: int):
@@ -9,15 +33,17 @@ class ProfitCalculator:
         :param investment_amount: Valor do empréstimo.
         :param rate_juros: Taxa de juros mensal (em porcentagem).
         :param duration: Duração do empréstimo em meses.
-        :param bank_profit_rate: Percentual do lucro total que será destinado ao banco.
-        :return: Tuple contendo (bank_profit, investor_profit).
+        :return: Tuple contendo (bank_profit, investor_profit, monthly_payment).
         """
         # Taxa de juros mensal
-        bank_profit_rate = 0.2
+        bank_profit_rate = BANK_PROFIT_RATE
         i = rate_juros / 100
 
         # Calcular o valor da parcela usando a fórmula da Tabela Price
-        monthly_payment = investment_amount * (i * pow(1 + i, duration)) / (pow(1 + i, duration) - 1)
+        if i == 0:
+            monthly_payment = investment_amount / duration
+        else:
+            monthly_payment = investment_amount * (i * pow(1 + i, duration)) / (pow(1 + i, duration) - 1)
 
         # Calcular lucro do banco e do investidor
         total_payment = monthly_payment * duration
@@ -25,4 +51,38 @@ class ProfitCalculator:
         bank_profit = total_interest * bank_profit_rate
         investor_profit = total_interest - bank_profit
 
-        return bank_profit, investor_profit, monthly_payment
\ No newline at end of file
+        return bank_profit, investor_profit, monthly_payment
+
+    @staticmethod
+    def calculate_profits_batch(investment_amounts, rates_juros, durations):
+        """
+        Versão vetorizada de `calculate_profits` para vários empréstimos de uma vez.
+
+        Os resultados coincidem com os da versão escalar com diferença relativa de
+        até `BATCH_RELATIVE_TOLERANCE`. Taxa zero gera parcela igual a valor / duração.
+
+        :param investment_amounts: Valores dos empréstimos (array-like).
+        :param rates_juros: Taxas de juros mensais em porcentagem (array-like ou escalar).
+        :param durations: Durações em meses (array-like ou escalar).
+        :return: Tuple de arrays (bank_profit, investor_profit, monthly_payment).
+        """
+        amounts, rates, months = np.broadcast_arrays(
+            np.asarray(investment_amounts, dtype=np.float64),
+            np.asarray(rates_juros, dtype=np.float64),
+            np.asarray(durations, dtype=np.float64),
+        )
+        i = rates / 100
+
+        growth = np.power(1 + i, months)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            monthly_payment = np.where(
+                i == 0,
+                amounts / months,
+                amounts * (i * growth) / (growth - 1),
+            )
+
+        total_interest = monthly_payment * months - amounts
+        bank_profit = total_interest * BANK_PROFIT_RATE
+        investor_profit = total_interest - bank_profit
+
+        return bank_profit, investor_profit, monthly_payment
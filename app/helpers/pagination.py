@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from pydantic import AwareDatetime, NaiveDatetime
+
+from app.core.config import get_settings
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Gera um cursor opaco a partir dos valores da chave de ordenação da última linha.
+
+    :param values: Valores da chave de ordenação (ex.: create_time, loan_id).
+    :return: String base64 segura para URL.
+    """
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    if kind in (AwareDatetime, NaiveDatetime):
+        if not isinstance(value, str):
+            raise ValueError("Invalid cursor")
+        parsed = datetime.fromisoformat(value)
+        # Coluna com fuso pede data com fuso, e vice-versa: o banco recusa a mistura
+        if (parsed.tzinfo is not None) != (kind is AwareDatetime):
+            raise ValueError("Invalid cursor")
+        return parsed
+    # bool é subclasse de int e não é um id válido
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def decode_cursor(cursor: str, *kinds: type) -> list:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+
+    :param cursor: Cursor recebido do cliente.
+    :param kinds: Tipo esperado de cada valor da chave: int, ou `AwareDatetime` /
+        `NaiveDatetime` (do pydantic) conforme a coluna tenha fuso ou não; datas voltam
+        convertidas de ISO 8601.
+    :raises ValueError: Se o cursor estiver malformado ou algum valor tiver o tipo errado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(kinds):
+        raise ValueError("Invalid cursor")
+    return [_decode_value(value, kind) for value, kind in zip(values, kinds)]
+
+
+def resolve_page_size(page_size: Optional[int]) -> int:
+    pagination = get_settings().pagination
+    if page_size is None:
+        return pagination.default_page_size
+    return max(1, min(page_size, pagination.max_page_size))
@@ -0,0 +1,98 @@
+import base64
+import binascii
+import hashlib
+import threading
+from typing import Callable, List
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+from app.core.config import get_settings
+from app.helpers.cache import TTLCache
+
+# Chaves já carregadas, pela impressão digital (SHA-256) do PEM: carregar uma chave
+# privada valida os primos e custa bem mais que a própria operação
+_KEY_CACHE = TTLCache(
+    max_size=get_settings().security.rsa_key_cache_max_size,
+    ttl=get_settings().security.rsa_key_cache_ttl_secs,
+)
+# As operações rodam em threads do threadpool e o TTLCache não é thread-safe (get reordena
+# e remove entradas); o lock cobre só o acesso ao cache, não o carregamento da chave
+_KEY_CACHE_LOCK = threading.Lock()
+
+_OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+
+class RSAError(ValueError):
+    """Chave, mensagem ou texto cifrado inválido."""
+
+
+def key_fingerprint(pem: str) -> str:
+    return hashlib.sha256(pem.strip().encode()).hexdigest()
+
+
+def _load_key(pem: str, kind: str, loader: Callable):
+    key_id = (kind, key_fingerprint(pem))
+    with _KEY_CACHE_LOCK:
+        key = _KEY_CACHE.get(key_id)
+    if key is None:
+        try:
+            key = loader(pem.strip().encode())
+        except (ValueError, TypeError) as e:
+            raise RSAError(f"Invalid {kind} key") from e
+        with _KEY_CACHE_LOCK:
+            _KEY_CACHE.set(key_id, key)
+    return key
+
+
+def load_public_key(pem: str) -> rsa.RSAPublicKey:
+    key = _load_key(pem, "public", load_pem_public_key)
+    if not isinstance(key, rsa.RSAPublicKey):
+        raise RSAError("Invalid public key")
+    return key
+
+
+def load_private_key(pem: str) -> rsa.RSAPrivateKey:
+    key = _load_key(pem, "private", lambda data: load_pem_private_key(data, password=None))
+    if not isinstance(key, rsa.RSAPrivateKey):
+        raise RSAError("Invalid private key")
+    return key
+
+
+def encrypt_many(messages: List[str], public_key_pem: str) -> List[str]:
+    """
+    Cifra cada mensagem com RSA-OAEP (SHA-256).
+
+    :param messages: Textos em UTF-8; cada um cabe no limite do OAEP (190 bytes numa chave de 2048 bits).
+    :param public_key_pem: Chave pública em PEM.
+    :return: Textos cifrados em base64, na ordem das mensagens.
+    :raises RSAError: Chave inválida ou mensagem longa demais para a chave.
+    """
+    key = load_public_key(public_key_pem)
+    try:
+        return [base64.b64encode(key.encrypt(message.encode(), _OAEP)).decode() for message in messages]
+    except ValueError as e:
+        raise RSAError("Message too long for this key") from e
+
+
+def encrypt(message: str, public_key_pem: str) -> str:
+    return encrypt_many([message], public_key_pem)[0]
+
+
+def decrypt(ciphertext: str, private_key_pem: str) -> str:
+    """
+    Decifra um texto gerado por `encrypt`.
+
+    :raises RSAError: Chave inválida ou texto cifrado que não corresponde à chave.
+    """
+    key = load_private_key(private_key_pem)
+    try:
+        return key.decrypt(base64.b64decode(ciphertext, validate=True), _OAEP).decode()
+    except (ValueError, binascii.Error, UnicodeDecodeError) as e:
+        raise RSAError("Decryption failed") from e
+
+
+def clear_key_cache() -> None:
+    with _KEY_CACHE_LOCK:
+        _KEY_CACHE.clear()
@@ -0,0 +1,40 @@
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from typing import Any, List, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """
+    TypeAdapter de `List[model]`, criado uma única vez por modelo.
+
+    :param model: Modelo de resposta dos itens da lista.
+    """
+    return TypeAdapter(List[model])
+
+
+def validate_list(model: type[M], rows: Iterable[Any], from_attributes: bool = False) -> List[M]:
+    """
+    Monta a lista de respostas em uma única chamada ao pydantic-core.
+
+    :param model: Modelo de resposta dos itens.
+    :param rows: Dicionários com os campos do modelo (ou objetos ORM, com `from_attributes`).
+    :param from_attributes: Ler os campos por atributo em vez de por chave.
+    :return: Lista de instâncias de `model`.
+    """
+    return list_adapter(model).validate_python(list(rows), from_attributes=from_attributes)
+
+
+def dump_json_list(model: type[M], items: Sequence[M]) -> bytes:
+    """
+    Serializa a lista de respostas direto para JSON, sem passar por objetos Python intermediários.
+
+    :param model: Modelo de resposta dos itens.
+    :param items: Instâncias de `model`.
+    :return: Corpo JSON em bytes.
+    """
+    return list_adapter(model).dump_json(items)
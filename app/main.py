@@ -1,9 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api.api_router import api_router
 from app.core.config import get_settings
+from app.core.http_client import close_http_clients
+from app.services.metrics import MetricsCRUD
+from app.services.overdue_scanner import OverdueScanner
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs = get_settings().jobs
+    tasks = []
+    if jobs.overdue_scan_enabled:
+        tasks.append(asyncio.create_task(OverdueScanner().run(jobs.overdue_scan_interval_secs)))
+    if jobs.metrics_fold_enabled:
+        tasks.append(asyncio.create_task(MetricsCRUD.run_fold(jobs.metrics_fold_interval_secs)))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # release keep-alive connections of outbound http clients
+    await close_http_clients()
+
 
 app = FastAPI(
     title="Simula Fin",
@@ -11,6 +37,7 @@ app = FastAPI(
     description="https://simula-fin.github.io/DOCS/",
     openapi_url="/openapi.json",
     docs_url="/",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router)
@@ -22,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Guards against HTTP Host Header attacks
@@ -16,7 +16,7 @@
 import uuid
 from datetime import datetime, date
 
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, String, Uuid, func, Float, Enum, Date
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, String, Uuid, func, Float, Enum, Date, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -63,7 +63,7 @@ class Investor(Base):
     __tablename__ = "investor"
 
     investor_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("user_account.user_id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(ForeignKey("user_account.user_id", ondelete="CASCADE"), index=True)
     user: Mapped["User"] = relationship("User", back_populates="investor")
     investments: Mapped[list["Investment"]] = relationship("Investment", back_populates="investor")
     contracts: Mapped[list["Contract"]] = relationship("Contract", back_populates="investor")
@@ -72,7 +72,7 @@ class Borrower(Base):
     __tablename__ = "borrower"
 
     borrower_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("user_account.user_id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(ForeignKey("user_account.user_id", ondelete="CASCADE"), index=True)
     user: Mapped["User"] = relationship("User", back_populates="borrower")
     loan_applications: Mapped[list["Loan"]] = relationship("Loan", back_populates="borrower")
     risk_profile: Mapped["RiskProfile"] = relationship("RiskProfile", back_populates="borrower")
@@ -81,13 +81,17 @@ class Borrower(Base):
 
 class Loan(Base):
     __tablename__ = "loan"
+    __table_args__ = (
+        # keyset pagination of the marketplace listing
+        Index("ix_loan_create_time_loan_id", "create_time", "loan_id"),
+    )
 
     loan_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False)
+    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False, index=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     interest_rate: Mapped[float] = mapped_column(Float, nullable=False)
     duration: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending")
+    status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending", index=True)
     goals: Mapped[str] = mapped_column(Enum('viagem', 'compras', 'negocios', name='loan_objective'), nullable=False)
     bank_profit: Mapped[float] = mapped_column(Float, nullable=True)
     investor_profit: Mapped[float] = mapped_column(Float, nullable=True)
@@ -100,28 +104,39 @@ class RiskProfile(Base):
     __tablename__ = "risk_profile"
 
     profile_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False)
+    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False, index=True)
     risk_score: Mapped[int] = mapped_column(BigInteger, nullable=False)
     borrower: Mapped[Borrower] = relationship("Borrower", back_populates="risk_profile")
 
 class Investment(Base):
     __tablename__ = "investment"
+    __table_args__ = (
+        # client retries of POST /investments with the same Idempotency-Key
+        Index("uq_investment_investor_idempotency_key", "investor_id", "idempotency_key", unique=True),
+    )
 
     investment_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False)
-    investor_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('investor.investor_id'), nullable=False)
+    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False, index=True)
+    investor_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('investor.investor_id'), nullable=False, index=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
+    idempotency_key: Mapped[str] = mapped_column(String(64), nullable=True)
     loan: Mapped[Loan] = relationship("Loan", back_populates="investments")
     investor: Mapped[Investor] = relationship("Investor", back_populates="investments")
 
 class Contract(Base):
     __tablename__ = "contract"
+    __table_args__ = (
+        # keyset pagination of the contract listings, (date_signed, contract_id) overall and per side
+        Index("ix_contract_date_signed_contract_id", "date_signed", "contract_id"),
+        Index("ix_contract_borrower_id_date_signed", "borrower_id", "date_signed", "contract_id"),
+        Index("ix_contract_investor_id_date_signed", "investor_id", "date_signed", "contract_id"),
+    )
 
     contract_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False)
-    investor_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('investor.investor_id'), nullable=False)
-    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False)
-    status: Mapped[str] = mapped_column(String(50), nullable=False, default="active")
+    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False, index=True)
+    investor_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('investor.investor_id'), nullable=False, index=True)
+    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(50), nullable=False, default="active", index=True)
     date_signed: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     investor_signature_digital_uuid: Mapped[str] = mapped_column(String(36), nullable=True, default=str(uuid.uuid4()))
     borrower_signature_digital_uuid: Mapped[str] = mapped_column(String(36), nullable=True, default=str(uuid.uuid4()))
@@ -131,20 +146,74 @@ class Contract(Base):
 
 class Payment(Base):
     __tablename__ = "payment"
+    __table_args__ = (
+        # admin queue of installments paid by the borrower but not yet passed to the investor
+        Index(
+            "ix_payment_investor_payout_pending",
+            "status",
+            "status_payment_investor",
+            postgresql_where=text("status_payment_investor = 'pending'"),
+        ),
+        # payment history pages, keyset on (due_date, payment_id) per borrower / per loan
+        Index("ix_payment_borrower_id_due_date", "borrower_id", "due_date", "payment_id"),
+        Index("ix_payment_loan_id_due_date", "loan_id", "due_date", "payment_id"),
+        # overdue scanner: pending rows in due order, and the overdue rows aged per loan
+        Index(
+            "ix_payment_pending_due_date",
+            "due_date",
+            "payment_id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_payment_overdue_loan_id",
+            "loan_id",
+            postgresql_where=text("status = 'overdue'"),
+        ),
+    )
 
     payment_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False)
-    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False)
+    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id'), nullable=False, index=True)
+    borrower_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('borrower.borrower_id'), nullable=False, index=True)
     installment_number: Mapped[int] = mapped_column(BigInteger, nullable=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     due_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending")
+    status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending", index=True)
+    principal: Mapped[float] = mapped_column(Float, nullable=True)
+    interest: Mapped[float] = mapped_column(Float, nullable=True)
     bank_profit: Mapped[float] = mapped_column(Float, nullable=True)
     investor_profit: Mapped[float] = mapped_column(Float, nullable=True)
     loan: Mapped[Loan] = relationship("Loan", back_populates="payments")
     borrower: Mapped[Borrower] = relationship("Borrower", back_populates="payments")
     status_payment_investor: Mapped[str] = mapped_column(String(50), nullable=True, default="pending")
 
+class LoanDelinquency(Base):
+    """Overdue amounts of a loan split in aging buckets, kept by the overdue scanner."""
+    __tablename__ = "loan_delinquency"
+
+    loan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('loan.loan_id', ondelete="CASCADE"), primary_key=True)
+    overdue_installments: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    overdue_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    amount_1_30: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    amount_31_60: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    amount_61_90: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    amount_90_plus: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    oldest_due_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+class PlatformMetric(Base):
+    """Running platform-wide aggregate, folded periodically from `platform_metric_delta`."""
+    __tablename__ = "platform_metric"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+class PlatformMetricDelta(Base):
+    """Change to a platform aggregate, appended in the same transaction as the state change."""
+    __tablename__ = "platform_metric_delta"
+
+    delta_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+
 class Bank(Base):
     __tablename__ = "bank"
 
@@ -1,7 +1,17 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from datetime import datetime, date
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, StringConstraints, field_validator, model_validator
+from datetime import datetime, date, timezone
 from enum import Enum
-from typing import List
+from typing import Annotated, List, Optional
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+# Para comparar com colunas DateTime sem fuso: valores com fuso viram UTC sem fuso
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(_naive_utc)]
+
 class BaseRequest(BaseModel):
     # may define additional fields or config shared across requests
     pass
@@ -50,6 +60,69 @@ class LoanStatusEnum(str, Enum):
     payed = "payed"
     done = "done"
 
+# Filtros e paginação do marketplace de empréstimos
+class LoanListParams(BaseModel):
+    cursor: Optional[str] = None
+    page_size: Optional[int] = None
+    status: Optional[LoanStatusEnum] = None
+    goals: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    min_interest_rate: Optional[float] = None
+    max_interest_rate: Optional[float] = None
+    min_risk_score: Optional[int] = None
+    max_risk_score: Optional[int] = None
+
+class InvestmentSortEnum(str, Enum):
+    investment_id = "investment_id"
+    create_time = "create_time"
+    amount = "amount"
+    loan_amount = "loan_amount"
+    interest_rate = "interest_rate"
+    risk_score = "risk_score"
+
+# Paginação e ordenação das listagens de investimentos do admin
+class InvestmentListParams(BaseModel):
+    limit: Optional[int] = None
+    offset: int = 0
+    sort: InvestmentSortEnum = InvestmentSortEnum.investment_id
+    descending: bool = False
+
+# Paginação das listagens de contratos
+class ContractListParams(BaseModel):
+    cursor: Optional[str] = None
+    page_size: Optional[int] = None
+
+# Filtros e paginação do histórico de parcelas do tomador/investidor
+class PaymentHistoryParams(BaseModel):
+    cursor: Optional[str] = None
+    page_size: Optional[int] = None
+    status: Optional[str] = None
+    due_from: Optional[NaiveUTCDatetime] = None
+    due_to: Optional[NaiveUTCDatetime] = None
+
+# Atualização de status em lote: lista de ids ou filtro, nunca os dois
+BULK_MAX_PAYMENT_IDS = 5000
+
+class PaymentBulkFilter(BaseModel):
+    loan_id: Optional[int] = None
+    status: Optional[str] = None
+    status_payment_investor: Optional[str] = None
+    due_before: Optional[NaiveUTCDatetime] = None
+
+class PaymentBulkUpdateRequest(BaseModel):
+    status: str
+    payment_ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=BULK_MAX_PAYMENT_IDS)
+    filter: Optional[PaymentBulkFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.payment_ids is None) == (self.filter is None):
+            raise ValueError("Provide either payment_ids or filter")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter needs at least one condition")
+        return self
+
 # Schema para atualizar status do empréstimo
 class UpdateLoanStatusRequest(BaseModel):
     status: LoanStatusEnum
@@ -61,12 +134,28 @@ class RSAEncryptRequest(BaseModel):
     message: str
     public_key: str
 
+# Várias mensagens cifradas com a mesma chave pública
+RSA_BATCH_MAX_MESSAGES = 1000
+
+class RSAEncryptBatchRequest(BaseModel):
+    messages: List[str] = Field(min_length=1, max_length=RSA_BATCH_MAX_MESSAGES)
+    public_key: str
+
 class RSADecryptRequest(BaseModel):
     message: str
     private_key: str
 
+# Resumo de várias ações em uma requisição
+STOCK_BATCH_MAX_SYMBOLS = 50
+# O símbolo vira um segmento da URL do upstream: nada de "/", "?" ou ".." fora do ticker
+STOCK_SYMBOL_PATTERN = r"^[A-Za-z0-9.\-]{1,16}$"
+StockSymbol = Annotated[str, StringConstraints(pattern=STOCK_SYMBOL_PATTERN)]
+
+class StockSummaryBatchRequest(BaseModel):
+    symbols: List[StockSymbol] = Field(min_length=1, max_length=STOCK_BATCH_MAX_SYMBOLS)
+
 class ChatBotRequest(BaseModel):
     prompt: str
-    model: str = "gpt-3.5-turbo"
-    max_tokens: int = 2048
-    temperature: float = 0.5
\ No newline at end of file
+    model: str = "gpt-3.5-turbo-instruct"
+    max_tokens: int = Field(default=2048, ge=1, le=4096)
+    temperature: float = Field(default=0.5, ge=0.0, le=2.0)
\ No newline at end of file
@@ -1,6 +1,9 @@
 from datetime import date, datetime
+from enum import Enum
 from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
-from typing import List, Optional
+from typing import Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
 
 
 class BaseResponse(BaseModel):
@@ -14,6 +17,11 @@ class AccessTokenResponse(BaseResponse):
     refresh_token: str
     refresh_token_expires_at: int
 
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
 class LoanResponse(BaseModel):
     loan_id: int
     borrower_id: int
@@ -47,6 +55,8 @@ class PaymentResponse(BaseModel):
     status: str
     status_payment_investor: str
     investor_profit: Optional[float]
+    principal: Optional[float] = None
+    interest: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -90,6 +100,33 @@ class InvestmentResponsePersonalizated(BaseModel):
     class Config:
         from_attributes = True
 
+class PortfolioStatusBreakdown(BaseModel):
+    status: str
+    investments: int
+    invested_principal: float
+    expected_profit: float
+
+
+class InvestorPortfolioSummary(BaseModel):
+    investments: int
+    invested_principal: float
+    expected_profit: float
+    received_payouts: float
+    pending_payouts: float
+    next_due_date: Optional[datetime]
+    by_loan_status: List[PortfolioStatusBreakdown]
+
+class PlatformMetricsResponse(BaseModel):
+    total_lent: float
+    bank_profit_expected: float
+    bank_profit_realized: float
+    outstanding_principal: float
+    overdue_90_plus_amount: float
+    default_rate: float
+    investments: int
+    invested_amount: float
+    loans_by_status: Dict[str, int]
+
 class InvestmentResponseDetailed(BaseModel):
     investment_id: int
     amount: float
@@ -131,4 +168,23 @@ class PaymentResponseDetailed(BaseModel):
     investment: Optional[InvestmentResponse]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class PaymentBulkOutcomeEnum(str, Enum):
+    updated = "updated"
+    already_in_state = "already_in_state"
+    not_found = "not_found"
+
+
+class PaymentBulkResult(BaseModel):
+    payment_id: int
+    outcome: PaymentBulkOutcomeEnum
+    previous_status: Optional[str] = None
+
+
+class PaymentBulkUpdateResponse(BaseModel):
+    updated: int
+    already_in_state: int
+    not_found: int
+    results: List[PaymentBulkResult]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import get_settings
+from app.core.http_client import UPSTREAM_OPENAI, get_http_client
+from app.schemas.requests import ChatBotRequest
+
+# Vagas de chamadas ao bot neste processo
+_BOT_SLOTS = asyncio.Semaphore(get_settings().bot.max_concurrency)
+
+
+class ChatBot:
+
+    @staticmethod
+    def _headers() -> dict:
+        apiKey = get_settings().security.external_api_key.get_secret_value()
+        return {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {apiKey}"
+        }
+
+    @staticmethod
+    def _payload(request: ChatBotRequest, stream: bool = False) -> dict:
+        return {
+            "model": request.model,
+            "prompt": request.prompt,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+            "stream": stream,
+        }
+
+    @staticmethod
+    async def _acquire_slot() -> None:
+        # Sem fila: com todas as vagas ocupadas a requisição falha na hora
+        if _BOT_SLOTS.locked():
+            raise HTTPException(status_code=503, detail="Bot is busy, try again later", headers={"Retry-After": "1"})
+        await _BOT_SLOTS.acquire()
+
+    @staticmethod
+    async def complete(request: ChatBotRequest) -> dict:
+        await ChatBot._acquire_slot()
+        try:
+            response = await get_http_client(UPSTREAM_OPENAI).post(
+                "/completions",
+                headers=ChatBot._headers(),
+                json=ChatBot._payload(request)
+            )
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            return response.json()
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPError as e:
+            print (e)
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            _BOT_SLOTS.release()
+
+    @staticmethod
+    async def open_stream(request: ChatBotRequest) -> AsyncIterator[str]:
+        """
+        Abre a completion em modo stream e devolve os trechos de texto conforme chegam.
+
+        A vaga e a resposta do upstream ficam com o iterador devolvido e são liberadas
+        quando ele termina. Erros de status do upstream são levantados aqui, antes de
+        qualquer byte ser enviado ao cliente.
+
+        :raises HTTPException: 503 sem vaga livre ou com o circuito do upstream aberto;
+            500 se o upstream recusar a chamada.
+        """
+        await ChatBot._acquire_slot()
+        try:
+            client = get_http_client(UPSTREAM_OPENAI)
+            upstream = await client.send(
+                client.build_request(
+                    "POST",
+                    "/completions",
+                    headers={**ChatBot._headers(), "Accept": "text/event-stream"},
+                    json=ChatBot._payload(request, stream=True),
+                ),
+                stream=True,
+            )
+        except CircuitOpenError as e:
+            _BOT_SLOTS.release()
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPError as e:
+            _BOT_SLOTS.release()
+            print(e)
+            raise HTTPException(status_code=500, detail=str(e))
+
+        if upstream.is_error:
+            await upstream.aread()
+            await upstream.aclose()
+            _BOT_SLOTS.release()
+            raise HTTPException(status_code=500, detail=f"Upstream returned {upstream.status_code}: {upstream.text}")
+
+        return ChatBot._relay(upstream)
+
+    @staticmethod
+    async def _relay(upstream: httpx.Response) -> AsyncIterator[str]:
+        try:
+            # Eventos do upstream: `data: {json}` por trecho e `data: [DONE]` no fim
+            async for line in upstream.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                for choice in json.loads(data).get("choices", []):
+                    if choice.get("text"):
+                        yield choice["text"]
+        finally:
+            await upstream.aclose()
+            _BOT_SLOTS.release()
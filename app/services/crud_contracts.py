@@ -1,78 +1,163 @@
 import uuid
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select
+from sqlalchemy import delete, select, tuple_, union
 from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
-from app.models import Loan, User, Contract, Borrower, Investor
-from app.schemas.responses import ContractResponse, LoanResponsePersonalizated, UserResponse
-from typing import List
+from app.helpers.pagination import decode_cursor, encode_cursor, resolve_page_size
+from app.helpers.serialization import validate_list
+from app.models import Loan, User, Contract, Borrower, Investor, RiskProfile
+from app.schemas.requests import ContractListParams
+from app.schemas.responses import ContractResponse, Page
+from app.services.identity import IdentityContext, IdentityCRUD
+from typing import AsyncIterator, Optional
+from pydantic import NaiveDatetime
+from app.core.config import get_settings
 
 class ContractCRUD:
 
     @staticmethod
-    async def get_all_contracts(db: AsyncSession) -> List[ContractResponse]:
-        try:
-            borrower_user_alias = aliased(User)
-            investor_user_alias = aliased(User)
-
-            result = await db.execute(
-                select(Contract, Loan, Borrower, borrower_user_alias, Investor, investor_user_alias)
-                .outerjoin(Borrower, Contract.borrower_id == Borrower.borrower_id)
-                .outerjoin(Investor, Contract.investor_id == Investor.investor_id)
-                .outerjoin(Loan, Contract.loan_id == Loan.loan_id)
-                .outerjoin(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
-                .outerjoin(investor_user_alias, Investor.user_id == investor_user_alias.user_id)
+    def _contracts_query():
+        borrower_user_alias = aliased(User, name="borrower_user")
+        investor_user_alias = aliased(User, name="investor_user")
+
+        # Score mais recente do tomador, buscado pelo índice de risk_profile.borrower_id
+        risk_score = (
+            select(RiskProfile.risk_score)
+            .where(RiskProfile.borrower_id == Contract.borrower_id)
+            .order_by(RiskProfile.profile_id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        # Só as colunas usadas na resposta; todas as chaves estrangeiras são obrigatórias
+        return (
+            select(
+                Contract.contract_id,
+                Contract.loan_id,
+                Contract.investor_id,
+                Contract.borrower_id,
+                Contract.status,
+                Contract.date_signed,
+                Contract.investor_signature_digital_uuid,
+                Contract.borrower_signature_digital_uuid,
+                Loan.amount.label("loan_amount"),
+                Loan.interest_rate.label("loan_interest_rate"),
+                Loan.duration.label("loan_duration"),
+                Loan.status.label("loan_status"),
+                Loan.goals.label("loan_goals"),
+                Loan.investor_profit.label("loan_investor_profit"),
+                risk_score.label("risk_score"),
+                borrower_user_alias.user_id.label("borrower_user_id"),
+                borrower_user_alias.name.label("borrower_name"),
+                borrower_user_alias.email.label("borrower_email"),
+                borrower_user_alias.cpf.label("borrower_cpf"),
+                investor_user_alias.user_id.label("investor_user_id"),
+                investor_user_alias.name.label("investor_name"),
+                investor_user_alias.email.label("investor_email"),
+                investor_user_alias.cpf.label("investor_cpf"),
             )
-            contracts = result.all()
-
-            return [
-                ContractResponse(
-                    contract_id=contract[0].contract_id,
-                    loan_id=contract[0].loan_id,
-                    investor_id=contract[0].investor_id,
-                    borrower_id=contract[0].borrower_id,
-                    status=contract[0].status,
-                    date_signed=contract[0].date_signed,
-                    investor_signature_digital_uuid=contract[0].investor_signature_digital_uuid,
-                    borrower_signature_digital_uuid=contract[0].borrower_signature_digital_uuid,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=contract[1].loan_id,
-                        borrower_id=contract[1].borrower_id,
-                        amount=contract[1].amount,
-                        interest_rate=contract[1].interest_rate,
-                        duration=contract[1].duration,
-                        status=contract[1].status,
-                        goals=contract[1].goals,
-                        risk_score=30,
-                        investor_profit=contract[1].investor_profit,
-                        user = UserResponse(
-                            user_id=contract[3].user_id,
-                            name=contract[3].name,
-                            email=contract[3].email,
-                            cpf=contract[3].cpf
-                        )
-                    ),
-                    borrower_user=UserResponse(
-                        user_id=contract[3].user_id,
-                        name=contract[3].name,
-                        email=contract[3].email,
-                        cpf=contract[3].cpf
-                    ),
-                    investor_user=UserResponse(
-                        user_id=contract[5].user_id,
-                        name=contract[5].name,
-                        email=contract[5].email,
-                        cpf=contract[5].cpf
-                    )
-                )
-                for contract in contracts
+            .join(Loan, Contract.loan_id == Loan.loan_id)
+            .join(Borrower, Contract.borrower_id == Borrower.borrower_id)
+            .join(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
+            .join(Investor, Contract.investor_id == Investor.investor_id)
+            .join(investor_user_alias, Investor.user_id == investor_user_alias.user_id)
+        )
+
+    @staticmethod
+    def _contract_fields(contract) -> dict:
+        borrower_user = dict(
+            user_id=contract.borrower_user_id,
+            name=contract.borrower_name,
+            email=contract.borrower_email,
+            cpf=contract.borrower_cpf,
+        )
+        return dict(
+            contract_id=contract.contract_id,
+            loan_id=contract.loan_id,
+            investor_id=contract.investor_id,
+            borrower_id=contract.borrower_id,
+            status=contract.status,
+            date_signed=contract.date_signed,
+            investor_signature_digital_uuid=contract.investor_signature_digital_uuid,
+            borrower_signature_digital_uuid=contract.borrower_signature_digital_uuid,
+            loan=dict(
+                loan_id=contract.loan_id,
+                borrower_id=contract.borrower_id,
+                amount=contract.loan_amount,
+                interest_rate=contract.loan_interest_rate,
+                duration=contract.loan_duration,
+                status=contract.loan_status,
+                goals=contract.loan_goals,
+                risk_score=contract.risk_score,
+                investor_profit=contract.loan_investor_profit,
+                user=borrower_user,
+            ),
+            borrower_user=borrower_user,
+            investor_user=dict(
+                user_id=contract.investor_user_id,
+                name=contract.investor_name,
+                email=contract.investor_email,
+                cpf=contract.investor_cpf,
+            ),
+        )
+
+    @staticmethod
+    def _keyset(query, cursor: Optional[tuple], page_size: int):
+        """Página de `query` por (date_signed, contract_id), dos mais recentes para os mais antigos."""
+        if cursor is not None:
+            query = query.where(tuple_(Contract.date_signed, Contract.contract_id) < tuple_(*cursor))
+        return query.order_by(Contract.date_signed.desc(), Contract.contract_id.desc()).limit(page_size + 1)
+
+    @staticmethod
+    async def _contracts_page(db: AsyncSession, params: Optional[ContractListParams], identity: Optional[IdentityContext] = None) -> Page[ContractResponse]:
+        params = params or ContractListParams()
+        page_size = resolve_page_size(params.page_size)
+
+        cursor = None
+        if params.cursor:
+            try:
+                cursor = tuple(decode_cursor(params.cursor, NaiveDatetime, int))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        query = ContractCRUD._contracts_query()
+        if identity is not None:
+            # Uma busca por índice de cada lado (tomador e investidor), cada uma limitada à
+            # página; o UNION remove o contrato em que o usuário está dos dois lados
+            sides = [
+                ContractCRUD._keyset(select(Contract.contract_id, Contract.date_signed).where(column == role_id), cursor, page_size)
+                for column, role_id in ((Contract.borrower_id, identity.borrower_id), (Contract.investor_id, identity.investor_id))
+                if role_id is not None
             ]
-        
+            if not sides:
+                return Page[ContractResponse](items=[])
+            user_contracts = union(*sides).subquery("user_contracts")
+            query = query.join(user_contracts, user_contracts.c.contract_id == Contract.contract_id)
+
+        result = await db.execute(ContractCRUD._keyset(query, cursor, page_size))
+        contracts = result.all()
+
+        next_cursor = None
+        if len(contracts) > page_size:
+            contracts = contracts[:page_size]
+            next_cursor = encode_cursor(contracts[-1].date_signed, contracts[-1].contract_id)
+
+        items = validate_list(ContractResponse, (ContractCRUD._contract_fields(contract) for contract in contracts))
+        return Page[ContractResponse](items=items, next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_all_contracts(db: AsyncSession, params: Optional[ContractListParams] = None) -> Page[ContractResponse]:
+        try:
+            return await ContractCRUD._contracts_page(db, params)
+
+        except HTTPException:
+            raise
+
         except SQLAlchemyError as e:
             raise HTTPException(status_code=500, detail="Database error occurred")
         
@@ -80,68 +165,29 @@ class ContractCRUD:
             raise HTTPException(status_code=400, detail="Error fetching contracts")
 
     @staticmethod
-    async def get_user_contracts(db: AsyncSession, user: User) -> List[ContractResponse]:
+    async def stream_all_contracts(db: AsyncSession) -> AsyncIterator[ContractResponse]:
+        query = ContractCRUD._contracts_query().order_by(Contract.date_signed.desc(), Contract.contract_id.desc())
+        result = await db.stream(query.execution_options(yield_per=get_settings().pagination.stream_yield_per))
+        async for contract in result:
+            yield ContractResponse.model_validate(ContractCRUD._contract_fields(contract))
+
+    @staticmethod
+    async def get_user_contracts(
+        db: AsyncSession,
+        user: User,
+        identity: Optional[IdentityContext] = None,
+        params: Optional[ContractListParams] = None,
+    ) -> Page[ContractResponse]:
         try:
-            borrower_user_alias = aliased(User)
-            investor_user_alias = aliased(User)
-
-            result = await db.execute(
-                select(Contract, Loan, Borrower, borrower_user_alias, Investor, investor_user_alias)
-                .outerjoin(Borrower, Contract.borrower_id == Borrower.borrower_id)
-                .outerjoin(Investor, Contract.investor_id == Investor.investor_id)
-                .outerjoin(Loan, Contract.loan_id == Loan.loan_id)
-                .outerjoin(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
-                .outerjoin(investor_user_alias, Investor.user_id == investor_user_alias.user_id)
-                .where((Borrower.user_id == user["user_id"]) | (Investor.user_id == user["user_id"]))
-            )
-            contracts = result.all()
-
-            return [
-                ContractResponse(
-                    contract_id=contract[0].contract_id,
-                    loan_id=contract[0].loan_id,
-                    investor_id=contract[0].investor_id,
-                    borrower_id=contract[0].borrower_id,
-                    status=contract[0].status,
-                    date_signed=contract[0].date_signed,
-                    investor_signature_digital_uuid=contract[0].investor_signature_digital_uuid,
-                    borrower_signature_digital_uuid=contract[0].borrower_signature_digital_uuid,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=contract[1].loan_id,
-                        borrower_id=contract[1].borrower_id,
-                        amount=contract[1].amount,
-                        interest_rate=contract[1].interest_rate,
-                        duration=contract[1].duration,
-                        status=contract[1].status,
-                        goals=contract[1].goals,
-                        risk_score=30,
-                        investor_profit=contract[1].investor_profit,
-                        user = UserResponse(
-                            user_id=contract[3].user_id,
-                            name=contract[3].name,
-                            email=contract[3].email,
-                            cpf=contract[3].cpf
-                        )
-                    ),
-                    borrower_user=UserResponse(
-                        user_id=contract[3].user_id,
-                        name=contract[3].name,
-                        email=contract[3].email,
-                        cpf=contract[3].cpf
-                    ),
-                    investor_user=UserResponse(
-                        user_id=contract[5].user_id,
-                        name=contract[5].name,
-                        email=contract[5].email,
-                        cpf=contract[5].cpf
-                    )
-                )
-                for contract in contracts
-            ]
+            identity = identity or await IdentityCRUD.from_user(db, user)
+            return await ContractCRUD._contracts_page(db, params, identity)
+
+        except HTTPException:
+            raise
 
         except SQLAlchemyError as e:
             raise HTTPException(status_code=500, detail="Database error occurred")
 
         except Exception as e:
             print(e)
-            raise HTTPException(status_code=400, detail="Error fetching user contracts")
\ No newline at end of file
+            raise HTTPException(status_code=400, detail="Error fetching user contracts")
@@ -1,49 +1,83 @@
 import uuid
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select
+from sqlalchemy import delete, exists, func, insert, select, true, update
 from sqlalchemy.orm import selectinload, joinedload
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException
-from app.helpers.p2p_utils import ProfitCalculator
+from app.core.config import get_settings
+from app.helpers.amortization import AmortizationMethod, build_schedule
+from app.helpers.p2p_utils import monthly_due_dates
+from app.helpers.pagination import resolve_page_size
+from app.helpers.serialization import validate_list
 from app.models import Loan, Borrower, RiskProfile, User, Investment, Investor, Payment, Contract
-from app.schemas.requests import InvestmentRequest
-from app.schemas.responses import InvestmentResponse, InvestmentResponsePersonalizated, LoanResponse, InvestmentResponseDetailed, LoanResponsePersonalizated, UserResponse
-from typing import List
+from app.services.identity import IdentityContext, IdentityCRUD
+from app.services.metrics import MetricsCRUD
+from app.schemas.requests import InvestmentListParams, InvestmentRequest, InvestmentSortEnum
+from app.schemas.responses import InvestmentResponse, InvestmentResponsePersonalizated, InvestorPortfolioSummary, InvestmentResponseDetailed, PortfolioStatusBreakdown
+from typing import AsyncIterator, List, Optional
 from sqlalchemy.orm import aliased
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
 class InvestmentCRUD:
 
     @staticmethod
-    async def create_investment(db: AsyncSession, investment_in: InvestmentRequest, user: User) -> InvestmentResponse:
+    async def create_investment(
+        db: AsyncSession,
+        investment_in: InvestmentRequest,
+        user: User,
+        idempotency_key: Optional[str] = None,
+        identity: Optional[IdentityContext] = None,
+    ) -> InvestmentResponse:
         try:
             # Verificar se o investidor é válido
-            investor = await db.scalar(select(Investor).where(Investor.user_id == user["user_id"]))
-            if not investor:
+            identity = identity or await IdentityCRUD.from_user(db, user)
+            investor_id = identity.investor_id
+            if investor_id is None:
                 raise HTTPException(status_code=404, detail="Investor not found")
 
-            # Verificar se o empréstimo é válido
-            loan = await db.scalar(select(Loan).where(Loan.loan_id == investment_in.loan_id, Loan.status == "pending"))
-            if not loan:
+            # Retentativa do cliente: devolver o investimento já criado com a mesma chave
+            if idempotency_key:
+                existing = await InvestmentCRUD._get_by_idempotency_key(db, investor_id, idempotency_key)
+                if existing:
+                    return InvestmentResponse.from_orm(existing)
+
+            # Reservar o empréstimo com um UPDATE condicional: a linha fica travada até
+            # o commit e só um investidor concorrente consegue passar de pending para solicited
+            loan_id = await db.scalar(
+                update(Loan)
+                .where(Loan.loan_id == investment_in.loan_id, Loan.status == "pending")
+                .values(status="solicited")
+                .returning(Loan.loan_id)
+            )
+            if not loan_id:
+                await db.rollback()
+                if idempotency_key:
+                    existing = await InvestmentCRUD._get_by_idempotency_key(db, investor_id, idempotency_key)
+                    if existing:
+                        return InvestmentResponse.from_orm(existing)
                 raise HTTPException(status_code=404, detail="Loan not found")
 
-            # Criar nova instância de Investment
+            # Criar nova instância de Investment na mesma transação
             investment = Investment(
-                loan_id=investment_in.loan_id,
-                investor_id=investor.investor_id,
-                amount=investment_in.amount
+                loan_id=loan_id,
+                investor_id=investor_id,
+                amount=investment_in.amount,
+                idempotency_key=idempotency_key
             )
             db.add(investment)
-            await db.commit()
-
-            # atualizar o status do empréstimo
-            loan.status = "solicited"
-            db.add(loan)
+            await MetricsCRUD.apply(
+                db,
+                MetricsCRUD.diff(
+                    MetricsCRUD.loan_contribution("pending", None, None),
+                    MetricsCRUD.loan_contribution("solicited", None, None)
+                    + MetricsCRUD.investment_contribution(investment_in.amount),
+                ),
+            )
             await db.commit()
 
             # Retornar a resposta
@@ -53,7 +87,20 @@ class InvestmentCRUD:
                 investor_id=investment.investor_id,
                 amount=investment.amount
             )
+
+        except HTTPException:
+            await db.rollback()
+            raise
         
+        except IntegrityError as e:
+            await db.rollback()
+            # Outra requisição com a mesma chave foi confirmada primeiro
+            existing = await InvestmentCRUD._get_by_idempotency_key(db, investor_id, idempotency_key) if idempotency_key else None
+            if existing:
+                return InvestmentResponse.from_orm(existing)
+            print(e)
+            raise HTTPException(status_code=500, detail="Database error occurred")
+
         except SQLAlchemyError as e:
             print(e)
             await db.rollback()
@@ -64,27 +111,54 @@ class InvestmentCRUD:
             raise HTTPException(status_code=400, detail="Error creating investment")
 
     @staticmethod
-    async def generate_payments(db: AsyncSession, loan: Loan, investment_amount: float):
+    async def _get_by_idempotency_key(db: AsyncSession, investor_id: int, idempotency_key: str) -> Optional[Investment]:
+        return await db.scalar(
+            select(Investment).where(
+                Investment.investor_id == investor_id,
+                Investment.idempotency_key == idempotency_key,
+            )
+        )
+
+    @staticmethod
+    async def generate_payments(
+        db: AsyncSession,
+        loan: Loan,
+        investment_amount: float,
+        commit: bool = True,
+        method: AmortizationMethod = AmortizationMethod.price,
+    ) -> List[int]:
         try:
-            bank_profit, investor_profit, monthly_payment = ProfitCalculator.calculate_profits(
-                investment_amount, loan.interest_rate, loan.duration
+            schedule = build_schedule(investment_amount, loan.interest_rate, loan.duration, method)
+            due_dates = monthly_due_dates(datetime.now(), loan.duration)
+
+            # Todas as parcelas em um único INSERT multi-linha, com os ids no RETURNING
+            result = await db.execute(
+                insert(Payment).returning(Payment.payment_id, sort_by_parameter_order=True),
+                [
+                    {
+                        "loan_id": loan.loan_id,
+                        "borrower_id": loan.borrower_id,
+                        "installment_number": installment.number,
+                        "amount": installment.payment,
+                        "due_date": due_date,
+                        "status": "pending",
+                        "principal": installment.principal,
+                        "interest": installment.interest,
+                        "bank_profit": installment.bank_share,
+                        "investor_profit": installment.investor_share,
+                    }
+                    for installment, due_date in zip(schedule, due_dates)
+                ],
             )
+            payment_ids = list(result.scalars())
 
-            for i in range(loan.duration):
-                due_date = datetime.now() + timedelta(days=30 * (i + 1))
-                payment = Payment(
-                    loan_id=loan.loan_id,
-                    borrower_id=loan.borrower_id,
-                    installment_number=i + 1,
-                    amount=monthly_payment,
-                    due_date=due_date,
-                    status="pending",
-                    bank_profit=bank_profit / loan.duration,
-                    investor_profit=investor_profit / loan.duration
-                )
-                db.add(payment)
-            
-            await db.commit()
+            await MetricsCRUD.apply(
+                db, {"outstanding_principal": sum(installment.principal for installment in schedule)}
+            )
+
+            if commit:
+                await db.commit()
+            return payment_ids
         
         except SQLAlchemyError as e:
             await db.rollback()
@@ -94,53 +168,129 @@ class InvestmentCRUD:
             raise HTTPException(status_code=400, detail="Error generating payments")
 
     @staticmethod
-    async def list_investments(db: AsyncSession) -> List[InvestmentResponseDetailed]:
-        try:
-            borrower_user_alias = aliased(User)
-            investor_user_alias = aliased(User)
-            
-            result = await db.execute(
-                select(Investment, Loan, Borrower, borrower_user_alias, Investor, RiskProfile, investor_user_alias)
-                .join(Loan, Investment.loan_id == Loan.loan_id)
-                .join(Borrower, Loan.borrower_id == Borrower.borrower_id)
-                .join(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
-                .join(Investor, Investment.investor_id == Investor.investor_id)
-                .join(RiskProfile, Borrower.borrower_id == RiskProfile.borrower_id)
-                .join(investor_user_alias, Investor.user_id == investor_user_alias.user_id)  # Join com alias para Investor User
+    def _investment_list_query(
+        params: InvestmentListParams,
+        loan_status: Optional[str] = None,
+        pending_investor_payout: bool = False,
+    ):
+        """
+        Consulta única das listagens de investimentos do admin.
+
+        Seleciona apenas as colunas usadas por `InvestmentResponseDetailed`, sem
+        hidratar entidades ORM, e aplica filtros, ordenação e paginação.
+        """
+        borrower_user = aliased(User)
+        investor_user = aliased(User)
+
+        query = (
+            select(
+                Investment.investment_id,
+                Investment.amount,
+                Loan.loan_id,
+                Loan.borrower_id,
+                Loan.amount.label("loan_amount"),
+                Loan.interest_rate,
+                Loan.duration,
+                Loan.status,
+                Loan.goals,
+                Loan.investor_profit,
+                RiskProfile.risk_score,
+                borrower_user.user_id.label("borrower_user_id"),
+                borrower_user.name.label("borrower_name"),
+                borrower_user.email.label("borrower_email"),
+                borrower_user.cpf.label("borrower_cpf"),
+                investor_user.user_id.label("investor_user_id"),
+                investor_user.name.label("investor_name"),
+                investor_user.email.label("investor_email"),
+                investor_user.cpf.label("investor_cpf"),
             )
-            investments = result.all()
-            
-            return [
-                InvestmentResponseDetailed(
-                    investment_id=investment[0].investment_id,
-                    amount=investment[0].amount,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=investment[1].loan_id,
-                        borrower_id=investment[1].borrower_id,
-                        amount=investment[1].amount,
-                        interest_rate=investment[1].interest_rate,
-                        duration=investment[1].duration,
-                        status=investment[1].status,
-                        goals=investment[1].goals,
-                        risk_score=investment[5].risk_score,
-                        investor_profit=investment[1].investor_profit,
-                        user=UserResponse(
-                            user_id=investment[3].user_id,
-                            name=investment[3].name,
-                            email=investment[3].email,
-                            cpf=investment[3].cpf
-                        )
-                    ),
-                    investor=UserResponse(
-                        user_id=investment[6].user_id,
-                        name=investment[6].name,
-                        email=investment[6].email,
-                        cpf=investment[6].cpf
-                    )
+            .join(Loan, Investment.loan_id == Loan.loan_id)
+            .join(Borrower, Loan.borrower_id == Borrower.borrower_id)
+            .join(borrower_user, Borrower.user_id == borrower_user.user_id)
+            .join(Investor, Investment.investor_id == Investor.investor_id)
+            .join(RiskProfile, Borrower.borrower_id == RiskProfile.borrower_id)
+            .join(investor_user, Investor.user_id == investor_user.user_id)
+        )
+
+        if loan_status is not None:
+            query = query.where(Loan.status == loan_status)
+        if pending_investor_payout:
+            # Repasse ao investidor pendente em alguma parcela do empréstimo
+            query = query.where(
+                exists().where(
+                    Payment.loan_id == Loan.loan_id,
+                    Payment.status_payment_investor == "pending",
                 )
-                for investment in investments
-            ]
-        
+            )
+
+        sort_column = {
+            InvestmentSortEnum.investment_id: Investment.investment_id,
+            InvestmentSortEnum.create_time: Investment.create_time,
+            InvestmentSortEnum.amount: Investment.amount,
+            InvestmentSortEnum.loan_amount: Loan.amount,
+            InvestmentSortEnum.interest_rate: Loan.interest_rate,
+            InvestmentSortEnum.risk_score: RiskProfile.risk_score,
+        }[params.sort]
+        if params.descending:
+            query = query.order_by(sort_column.desc(), Investment.investment_id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Investment.investment_id.asc())
+
+        if params.limit is not None:
+            query = query.limit(resolve_page_size(params.limit))
+        if params.offset:
+            query = query.offset(params.offset)
+
+        return query
+
+    @staticmethod
+    def _investment_detailed_fields(row) -> dict:
+        return dict(
+            investment_id=row.investment_id,
+            amount=row.amount,
+            loan=dict(
+                loan_id=row.loan_id,
+                borrower_id=row.borrower_id,
+                amount=row.loan_amount,
+                interest_rate=row.interest_rate,
+                duration=row.duration,
+                status=row.status,
+                goals=row.goals,
+                risk_score=row.risk_score,
+                investor_profit=row.investor_profit,
+                user=dict(
+                    user_id=row.borrower_user_id,
+                    name=row.borrower_name,
+                    email=row.borrower_email,
+                    cpf=row.borrower_cpf
+                )
+            ),
+            investor=dict(
+                user_id=row.investor_user_id,
+                name=row.investor_name,
+                email=row.investor_email,
+                cpf=row.investor_cpf
+            )
+        )
+
+    @staticmethod
+    async def _list_investments_detailed(
+        db: AsyncSession,
+        params: Optional[InvestmentListParams],
+        loan_status: Optional[str] = None,
+        pending_investor_payout: bool = False,
+    ) -> List[InvestmentResponseDetailed]:
+        try:
+            query = InvestmentCRUD._investment_list_query(
+                params or InvestmentListParams(), loan_status, pending_investor_payout
+            )
+            result = await db.execute(query)
+
+            return validate_list(
+                InvestmentResponseDetailed,
+                (InvestmentCRUD._investment_detailed_fields(row) for row in result),
+            )
+
         except SQLAlchemyError as e:
             print(e)
             raise HTTPException(status_code=500, detail="Database error occurred")
@@ -150,11 +300,40 @@ class InvestmentCRUD:
             raise HTTPException(status_code=500, detail="Error retrieving investments")
 
     @staticmethod
-    async def generate_contract(db: AsyncSession, loan: Loan, investor: Investor):
+    async def _stream_investments_detailed(
+        db: AsyncSession,
+        params: Optional[InvestmentListParams],
+        loan_status: Optional[str] = None,
+        pending_investor_payout: bool = False,
+    ) -> AsyncIterator[InvestmentResponseDetailed]:
+        query = InvestmentCRUD._investment_list_query(
+            params or InvestmentListParams(), loan_status, pending_investor_payout
+        )
+        # Cursor no servidor: as linhas chegam em lotes de `yield_per`
+        result = await db.stream(query.execution_options(yield_per=get_settings().pagination.stream_yield_per))
+        async for row in result:
+            yield InvestmentResponseDetailed.model_validate(InvestmentCRUD._investment_detailed_fields(row))
+
+    @staticmethod
+    async def list_investments(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> List[InvestmentResponseDetailed]:
+        return await InvestmentCRUD._list_investments_detailed(db, params)
+
+    @staticmethod
+    async def list_investments_payed(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> List[InvestmentResponseDetailed]:
+        return await InvestmentCRUD._list_investments_detailed(
+            db, params, loan_status="payed", pending_investor_payout=True
+        )
+
+    @staticmethod
+    async def list_investment_status_approved(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> List[InvestmentResponseDetailed]:
+        return await InvestmentCRUD._list_investments_detailed(db, params, loan_status="approved")
+
+    @staticmethod
+    async def generate_contract(db: AsyncSession, loan: Loan, investor_id: int, commit: bool = True):
         try:
             contract = Contract(
                 loan_id=loan.loan_id,
-                investor_id=investor.investor_id,
+                investor_id=investor_id,
                 borrower_id=loan.borrower_id,
                 status="active",
                 date_signed=datetime.now(),
@@ -163,7 +342,8 @@ class InvestmentCRUD:
             )
             db.add(contract)
 
-            await db.commit()
+            if commit:
+                await db.commit()
         
         except SQLAlchemyError as e:
             await db.rollback()
@@ -174,11 +354,11 @@ class InvestmentCRUD:
             raise HTTPException(status_code=400, detail="Error generating contract")
 
     @staticmethod
-    async def list_user_investments(db: AsyncSession, user_id: int) -> List[InvestmentResponsePersonalizated]:
+    async def list_user_investments(db: AsyncSession, user_id: int, identity: Optional[IdentityContext] = None) -> List[InvestmentResponsePersonalizated]:
         try:
             # Verificar se o usuário é um investidor válido
-            investor = await db.scalar(select(Investor).where(Investor.user_id == user_id))
-            if not investor:
+            identity = identity or await IdentityCRUD.resolve(db, user_id)
+            if identity.investor_id is None:
                 raise HTTPException(status_code=404, detail="Investor not found")
 
             # Consultar os investimentos do usuário com informações do empréstimo
@@ -193,17 +373,17 @@ class InvestmentCRUD:
                     joinedload(Investment.investor).joinedload(Investor.user),
                     joinedload(Loan.borrower).joinedload(Borrower.user)
                 )
-                .where(Investment.investor_id == investor.investor_id)
+                .where(Investment.investor_id == identity.investor_id)
             )
             investments = result.all()
 
-            return [
-                InvestmentResponsePersonalizated(
+            return validate_list(InvestmentResponsePersonalizated, (
+                dict(
                     investment_id=investment[0].investment_id,
                     loan_id=investment[0].loan_id,
                     investor_id=investment[0].investor_id,
                     amount=investment[0].amount,
-                    loan=LoanResponse(
+                    loan=dict(
                         loan_id=investment[1].loan_id,
                         borrower_id=investment[1].borrower_id,
                         amount=investment[1].amount,
@@ -214,13 +394,13 @@ class InvestmentCRUD:
                         investor_profit=investment[1].investor_profit,
                     ),
                     risk_score=investment[4].risk_score,
-                    borrower_user=UserResponse(
+                    borrower_user=dict(
                         user_id=investment[2].user_id,
                         name=investment[2].user.name,
                         email=investment[2].user.email,
                         cpf=investment[2].user.cpf
                     ),
-                    investor_user=UserResponse(
+                    investor_user=dict(
                         user_id=investment[0].investor.user.user_id,
                         name=investment[0].investor.user.name,
                         email=investment[0].investor.user.email,
@@ -228,122 +408,94 @@ class InvestmentCRUD:
                     )
                 )
                 for investment in investments
-            ]
+            ))
         
         except Exception as e:
             print(e)
             raise HTTPException(status_code=500, detail="Error retrieving user investments")
 
     @staticmethod
-    async def list_investments_payed(db: AsyncSession) -> List[InvestmentResponseDetailed]:
+    async def get_user_portfolio_summary(db: AsyncSession, user_id: int, identity: Optional[IdentityContext] = None) -> InvestorPortfolioSummary:
         try:
-            borrower_user_alias = aliased(User)
-            investor_user_alias = aliased(User)
-            
-            result = await db.execute(
-                select(Investment, Loan, Borrower, borrower_user_alias, Investor, RiskProfile, investor_user_alias)
-                .join(Loan, Investment.loan_id == Loan.loan_id)
-                .join(Borrower, Loan.borrower_id == Borrower.borrower_id)
-                .join(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
-                .join(Investor, Investment.investor_id == Investor.investor_id)
-                .join(RiskProfile, Borrower.borrower_id == RiskProfile.borrower_id)
-                .join(investor_user_alias, Investor.user_id == investor_user_alias.user_id)
-                .where(Loan.status == "payed" and Loan.status_payment_investor == "pending")
-            )
-            investments = result.all()
-            
-            return [
-                InvestmentResponseDetailed(
-                    investment_id=investment[0].investment_id,
-                    amount=investment[0].amount,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=investment[1].loan_id,
-                        borrower_id=investment[1].borrower_id,
-                        amount=investment[1].amount,
-                        interest_rate=investment[1].interest_rate,
-                        duration=investment[1].duration,
-                        status=investment[1].status,
-                        goals=investment[1].goals,
-                        risk_score=investment[5].risk_score,
-                        investor_profit=investment[1].investor_profit,
-                        user=UserResponse(
-                            user_id=investment[3].user_id,
-                            name=investment[3].name,
-                            email=investment[3].email,
-                            cpf=investment[3].cpf
-                        )
-                    ),
-                    investor=UserResponse(
-                        user_id=investment[6].user_id,
-                        name=investment[6].name,
-                        email=investment[6].email,
-                        cpf=investment[6].cpf
+            identity = identity or await IdentityCRUD.resolve(db, user_id)
+            if identity.investor_id is None:
+                raise HTTPException(status_code=404, detail="Investor not found")
+
+            # Repasse ao investidor: parcela menos a fatia do banco
+            payout = Payment.amount - func.coalesce(Payment.bank_profit, 0.0)
+            payouts = (
+                select(
+                    func.coalesce(func.sum(payout).filter(Payment.status_payment_investor == "payed"), 0.0).label("received_payouts"),
+                    func.coalesce(func.sum(payout).filter(Payment.status_payment_investor.is_distinct_from("payed")), 0.0).label("pending_payouts"),
+                    # Parcelas vencidas continuam em aberto e são as mais urgentes
+                    func.min(Payment.due_date).filter(Payment.status.in_(("pending", "overdue"))).label("next_due_date"),
+                )
+                .where(
+                    Payment.loan_id.in_(
+                        select(Investment.loan_id).where(Investment.investor_id == identity.investor_id)
                     )
                 )
-                for investment in investments
-            ]
-        
-        except SQLAlchemyError as e:
-            print(e)
-            raise HTTPException(status_code=500, detail="Database error occurred")
-        
-        except Exception as e:
-            print(e)
-            raise HTTPException(status_code=500, detail="Error retrieving investments")
-        
-    @staticmethod
-    async def list_investment_status_approved(db: AsyncSession) -> List[InvestmentResponseDetailed]:
-        try:
-            borrower_user_alias = aliased(User)
-            investor_user_alias = aliased(User)
-            
-            result = await db.execute(
-                select(Investment, Loan, Borrower, borrower_user_alias, Investor, RiskProfile, investor_user_alias)
+                .subquery()
+            )
+            by_status = (
+                select(
+                    Loan.status,
+                    func.count().label("investments"),
+                    func.sum(Investment.amount).label("invested_principal"),
+                    func.coalesce(func.sum(Loan.investor_profit), 0.0).label("expected_profit"),
+                )
                 .join(Loan, Investment.loan_id == Loan.loan_id)
-                .join(Borrower, Loan.borrower_id == Borrower.borrower_id)
-                .join(borrower_user_alias, Borrower.user_id == borrower_user_alias.user_id)
-                .join(Investor, Investment.investor_id == Investor.investor_id)
-                .join(RiskProfile, Borrower.borrower_id == RiskProfile.borrower_id)
-                .join(investor_user_alias, Investor.user_id == investor_user_alias.user_id)
-                .where(Loan.status == "approved")
+                .where(Investment.investor_id == identity.investor_id)
+                .group_by(Loan.status)
+                .subquery()
             )
-            investments = result.all()
-            
-            return [
-                InvestmentResponseDetailed(
-                    investment_id=investment[0].investment_id,
-                    amount=investment[0].amount,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=investment[1].loan_id,
-                        borrower_id=investment[1].borrower_id,
-                        amount=investment[1].amount,
-                        interest_rate=investment[1].interest_rate,
-                        duration=investment[1].duration,
-                        status=investment[1].status,
-                        goals=investment[1].goals,
-                        risk_score=investment[5].risk_score,
-                        investor_profit=investment[1].investor_profit,
-                        user=UserResponse(
-                            user_id=investment[3].user_id,
-                            name=investment[3].name,
-                            email=investment[3].email,
-                            cpf=investment[3].cpf
-                        )
-                    ),
-                    investor=UserResponse(
-                        user_id=investment[6].user_id,
-                        name=investment[6].name,
-                        email=investment[6].email,
-                        cpf=investment[6].cpf
-                    )
+
+            # Os totais de repasse (sempre uma linha) com uma linha por status de empréstimo
+            # ao lado; sem investimentos, sai uma linha só, com o status nulo
+            result = await db.execute(
+                select(payouts, by_status)
+                .select_from(payouts.outerjoin(by_status, true()))
+                .order_by(by_status.c.status)
+            )
+            rows = result.all()
+
+            breakdown = [
+                PortfolioStatusBreakdown(
+                    status=row.status,
+                    investments=row.investments,
+                    invested_principal=row.invested_principal,
+                    expected_profit=row.expected_profit,
                 )
-                for investment in investments
+                for row in rows
+                if row.status is not None
             ]
-        
+            return InvestorPortfolioSummary(
+                investments=sum(item.investments for item in breakdown),
+                invested_principal=sum(item.invested_principal for item in breakdown),
+                expected_profit=sum(item.expected_profit for item in breakdown),
+                received_payouts=rows[0].received_payouts,
+                pending_payouts=rows[0].pending_payouts,
+                next_due_date=rows[0].next_due_date,
+                by_loan_status=breakdown,
+            )
+
+        except HTTPException:
+            raise
+
         except SQLAlchemyError as e:
             print(e)
             raise HTTPException(status_code=500, detail="Database error occurred")
-        
-        except Exception as e:
-            print(e)
-            raise HTTPException(status_code=500, detail="Error retrieving investments")    
\ No newline at end of file
+
+    @staticmethod
+    def stream_investments(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> AsyncIterator[InvestmentResponseDetailed]:
+        return InvestmentCRUD._stream_investments_detailed(db, params)
+
+    @staticmethod
+    def stream_investments_payed(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> AsyncIterator[InvestmentResponseDetailed]:
+        return InvestmentCRUD._stream_investments_detailed(
+            db, params, loan_status="payed", pending_investor_payout=True
+        )
+
+    @staticmethod
+    def stream_investment_status_approved(db: AsyncSession, params: Optional[InvestmentListParams] = None) -> AsyncIterator[InvestmentResponseDetailed]:
+        return InvestmentCRUD._stream_investments_detailed(db, params, loan_status="approved")
@@ -1,43 +1,48 @@
 import uuid
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select, and_
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import delete, func, select, and_, tuple_, update
+from sqlalchemy.orm import selectinload
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
+from app.helpers.pagination import decode_cursor, encode_cursor, resolve_page_size
+from app.helpers.serialization import validate_list
 from app.models import Investment, Investor, Loan, User, Payment, Borrower
-from app.schemas.requests import PaymentUpdateRequest
-from app.schemas.responses import InvestmentResponse, LoanResponsePersonalizated, PaymentResponse, PaymentResponseDetailed, UserResponse
-from typing import List
+from app.schemas.requests import BULK_MAX_PAYMENT_IDS, PaymentBulkUpdateRequest, PaymentHistoryParams, PaymentUpdateRequest
+from app.services.identity import IdentityContext, IdentityCRUD
+from app.services.metrics import MetricsCRUD
+from app.schemas.responses import (
+    Page,
+    PaymentBulkOutcomeEnum,
+    PaymentBulkResult,
+    PaymentBulkUpdateResponse,
+    PaymentResponse,
+    PaymentResponseDetailed,
+)
+from collections import Counter
+from typing import AsyncIterator, List, Optional
+from pydantic import NaiveDatetime
+from app.core.config import get_settings
 
 
 class PaymentCRUD:
 
     @staticmethod
-    async def get_user_payments(db: AsyncSession, user: User) -> List[PaymentResponse]:
+    async def get_user_payments(db: AsyncSession, user: User, identity: Optional[IdentityContext] = None) -> List[PaymentResponse]:
         try:
-            result = await db.execute(
-                select(User)
-                .options(
-                    selectinload(User.investor),
-                    selectinload(User.borrower)
-                )
-                .filter_by(user_id=user["user_id"])
-            )
-            user = result.scalars().first()
-            
-            if user is None:
-                return []
+            identity = identity or await IdentityCRUD.from_user(db, user)
 
-            query = select(Payment).options(joinedload(Payment.loan))
+            query = select(Payment)
 
-            if user.investor:
-                query = query.join(Loan).join(Investment).where(Investment.investor_id == user.investor.investor_id)
-            elif user.borrower:
-                query = query.where(Payment.borrower_id == user.borrower.borrower_id)
+            if identity.investor_id is not None:
+                query = query.join(Loan).join(Investment).where(Investment.investor_id == identity.investor_id)
+            elif identity.borrower_id is not None:
+                query = query.where(Payment.borrower_id == identity.borrower_id)
+            else:
+                return []
 
             payments_result = await db.execute(query)
             payments = payments_result.scalars().all()
@@ -53,27 +58,59 @@ class PaymentCRUD:
             raise HTTPException(status_code=400, detail="Error fetching payments")
         
     @staticmethod
-    async def get_user_payments_borrower(db: AsyncSession, user: User) -> List[PaymentResponse]:
+    async def _payment_history_page(db: AsyncSession, query, params: PaymentHistoryParams) -> Page[PaymentResponse]:
+        """
+        Aplica filtros e a paginação por chave (due_date, payment_id), das parcelas mais antigas para as mais novas.
+        """
+        page_size = resolve_page_size(params.page_size)
+
+        if params.status is not None:
+            query = query.where(Payment.status == params.status)
+        if params.due_from is not None:
+            query = query.where(Payment.due_date >= params.due_from)
+        if params.due_to is not None:
+            query = query.where(Payment.due_date <= params.due_to)
+        if params.cursor:
+            try:
+                due_date, payment_id = decode_cursor(params.cursor, NaiveDatetime, int)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(tuple_(Payment.due_date, Payment.payment_id) > tuple_(due_date, payment_id))
+
+        result = await db.execute(
+            query.order_by(Payment.due_date.asc(), Payment.payment_id.asc()).limit(page_size + 1)
+        )
+        payments = result.scalars().all()
+
+        next_cursor = None
+        if len(payments) > page_size:
+            payments = payments[:page_size]
+            next_cursor = encode_cursor(payments[-1].due_date, payments[-1].payment_id)
+
+        return Page[PaymentResponse](
+            items=validate_list(PaymentResponse, payments, from_attributes=True),
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    async def get_user_payments_borrower(
+        db: AsyncSession,
+        user: User,
+        identity: Optional[IdentityContext] = None,
+        params: Optional[PaymentHistoryParams] = None,
+    ) -> Page[PaymentResponse]:
         try:
-            result = await db.execute(
-                select(User).options(selectinload(User.borrower)).filter_by(user_id=user["user_id"])
-            )
-            user = result.scalars().first()
-            
-            if user is None or user.borrower is None:
-                return []
+            identity = identity or await IdentityCRUD.from_user(db, user)
+            if identity.borrower_id is None:
+                return Page[PaymentResponse](items=[])
 
-            query = (
-                select(Payment)
-                .where(Payment.borrower_id == user.borrower.borrower_id)
-                .options(joinedload(Payment.loan))
-            )
+            query = select(Payment).where(Payment.borrower_id == identity.borrower_id)
+
+            return await PaymentCRUD._payment_history_page(db, query, params or PaymentHistoryParams())
+
+        except HTTPException:
+            raise
 
-            payments_result = await db.execute(query)
-            payments = payments_result.scalars().all()
-            
-            return [PaymentResponse.from_orm(payment) for payment in payments]
-            
         except SQLAlchemyError as e:
             print(e)
             raise HTTPException(status_code=500, detail="Database error occurred")
@@ -84,29 +121,29 @@ class PaymentCRUD:
 
 
     @staticmethod
-    async def get_user_payments_investor(db: AsyncSession, user: User) -> List[PaymentResponse]:
+    async def get_user_payments_investor(
+        db: AsyncSession,
+        user: User,
+        identity: Optional[IdentityContext] = None,
+        params: Optional[PaymentHistoryParams] = None,
+    ) -> Page[PaymentResponse]:
         try:
-            result = await db.execute(
-                select(User).options(selectinload(User.investor)).filter_by(user_id=user["user_id"])
-            )
-            user = result.scalars().first()
-            
-            if user is None or user.investor is None:
-                return []
+            identity = identity or await IdentityCRUD.from_user(db, user)
+            if identity.investor_id is None:
+                return Page[PaymentResponse](items=[])
 
-            query = (
-                select(Payment)
-                .join(Loan)
-                .join(Investment)
-                .options(joinedload(Payment.loan))
-                .where(Investment.investor_id == user.investor.investor_id)
+            # Semi-join pelos empréstimos do investidor, sem duplicar parcelas
+            query = select(Payment).where(
+                Payment.loan_id.in_(
+                    select(Investment.loan_id).where(Investment.investor_id == identity.investor_id)
+                )
             )
 
-            payments_result = await db.execute(query)
-            payments = payments_result.scalars().all()
-            
-            return [PaymentResponse.from_orm(payment) for payment in payments]
-            
+            return await PaymentCRUD._payment_history_page(db, query, params or PaymentHistoryParams())
+
+        except HTTPException:
+            raise
+
         except SQLAlchemyError as e:
             print(e)
             raise HTTPException(status_code=500, detail="Database error occurred")
@@ -115,6 +152,128 @@ class PaymentCRUD:
             print(e)
             raise HTTPException(status_code=400, detail="Error fetching payments")        
 
+    @staticmethod
+    def _bulk_criteria(request: PaymentBulkUpdateRequest) -> list:
+        if request.payment_ids is not None:
+            return [Payment.payment_id.in_(request.payment_ids)]
+
+        criteria = []
+        if request.filter.loan_id is not None:
+            criteria.append(Payment.loan_id == request.filter.loan_id)
+        if request.filter.status is not None:
+            criteria.append(Payment.status == request.filter.status)
+        if request.filter.status_payment_investor is not None:
+            criteria.append(Payment.status_payment_investor == request.filter.status_payment_investor)
+        if request.filter.due_before is not None:
+            criteria.append(Payment.due_date < request.filter.due_before)
+        return criteria
+
+    @staticmethod
+    async def _bulk_update(db: AsyncSession, column_name: str, request: PaymentBulkUpdateRequest) -> PaymentBulkUpdateResponse:
+        """
+        Aplica o novo valor de `column_name` a todas as parcelas do lote em um único comando.
+
+        As linhas alvo são travadas e o valor anterior é capturado em uma CTE; o UPDATE
+        só altera as que ainda não estão no estado pedido, e o SELECT final junta as duas.
+        Mudanças em `status` ajustam as métricas da plataforma na mesma transação.
+
+        Por filtro, no máximo `BULK_MAX_PAYMENT_IDS` parcelas: a CTE trava uma a mais para
+        detectar o excesso, e nesse caso nada é alterado e a requisição falha com 422.
+        """
+        column = getattr(Payment, column_name)
+
+        target = (
+            select(Payment.payment_id, column.label("previous_status"), Payment.principal, Payment.bank_profit)
+            .where(*PaymentCRUD._bulk_criteria(request))
+            .order_by(Payment.payment_id)
+            .limit(BULK_MAX_PAYMENT_IDS + 1)
+            .with_for_update()
+            .cte("target")
+        )
+        updated = (
+            update(Payment)
+            .where(
+                Payment.payment_id == target.c.payment_id,
+                target.c.previous_status.is_distinct_from(request.status),
+                select(func.count()).select_from(target).scalar_subquery() <= BULK_MAX_PAYMENT_IDS,
+            )
+            .values({column_name: request.status})
+            .returning(Payment.payment_id)
+            .cte("updated")
+        )
+        result = await db.execute(
+            select(
+                target.c.payment_id,
+                target.c.previous_status,
+                target.c.principal,
+                target.c.bank_profit,
+                updated.c.payment_id.is_not(None).label("changed"),
+            )
+            .select_from(target.outerjoin(updated, updated.c.payment_id == target.c.payment_id))
+            .order_by(target.c.payment_id)
+        )
+        rows = result.all()
+        if len(rows) > BULK_MAX_PAYMENT_IDS:
+            await db.rollback()
+            raise HTTPException(
+                status_code=422,
+                detail=f"Filter matches more than {BULK_MAX_PAYMENT_IDS} payments, narrow it down",
+            )
+
+        results = [
+            PaymentBulkResult(
+                payment_id=row.payment_id,
+                outcome=PaymentBulkOutcomeEnum.updated if row.changed else PaymentBulkOutcomeEnum.already_in_state,
+                previous_status=row.previous_status,
+            )
+            for row in rows
+        ]
+
+        if column_name == "status":
+            before, after = Counter(), Counter()
+            for row in rows:
+                if row.changed:
+                    before.update(MetricsCRUD.payment_contribution(row.previous_status, row.principal, row.bank_profit))
+                    after.update(MetricsCRUD.payment_contribution(request.status, row.principal, row.bank_profit))
+            await MetricsCRUD.apply(db, MetricsCRUD.diff(before, after))
+        await db.commit()
+
+        if request.payment_ids is not None:
+            found = {item.payment_id for item in results}
+            results += [
+                PaymentBulkResult(payment_id=payment_id, outcome=PaymentBulkOutcomeEnum.not_found)
+                for payment_id in dict.fromkeys(request.payment_ids)
+                if payment_id not in found
+            ]
+
+        outcomes = [item.outcome for item in results]
+        return PaymentBulkUpdateResponse(
+            updated=outcomes.count(PaymentBulkOutcomeEnum.updated),
+            already_in_state=outcomes.count(PaymentBulkOutcomeEnum.already_in_state),
+            not_found=outcomes.count(PaymentBulkOutcomeEnum.not_found),
+            results=results,
+        )
+
+    @staticmethod
+    async def bulk_update_payment_status(db: AsyncSession, request: PaymentBulkUpdateRequest) -> PaymentBulkUpdateResponse:
+        try:
+            return await PaymentCRUD._bulk_update(db, "status", request)
+
+        except SQLAlchemyError as e:
+            print(e)
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Database error occurred")
+
+    @staticmethod
+    async def bulk_update_payment_investor_status(db: AsyncSession, request: PaymentBulkUpdateRequest) -> PaymentBulkUpdateResponse:
+        try:
+            return await PaymentCRUD._bulk_update(db, "status_payment_investor", request)
+
+        except SQLAlchemyError as e:
+            print(e)
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Database error occurred")
+
     @staticmethod
     async def update_payment_status(db: AsyncSession, payment_id: int, status: str) -> PaymentResponse:
         try:
@@ -122,8 +281,13 @@ class PaymentCRUD:
             if not payment:
                 raise HTTPException(status_code=404, detail="Payment not found")
 
+            before = MetricsCRUD.payment_contribution(payment.status, payment.principal, payment.bank_profit)
             payment.status = status
             db.add(payment)
+            await MetricsCRUD.apply(
+                db,
+                MetricsCRUD.diff(before, MetricsCRUD.payment_contribution(payment.status, payment.principal, payment.bank_profit)),
+            )
             await db.commit()
             await db.refresh(payment)
 
@@ -160,73 +324,76 @@ class PaymentCRUD:
             raise HTTPException(status_code=400, detail="Error updating payment investor status")
         
     @staticmethod
-    async def get_investor_pending_payments(db: AsyncSession) -> list[PaymentResponseDetailed]:
-        try:
-            stmt = (
-                select(Payment, Loan, Investment, Investor, User)
-                .join(Loan, Payment.loan_id == Loan.loan_id)
-                .join(Borrower, Payment.borrower_id == Borrower.borrower_id)
-                .join(Investment, Loan.loan_id == Investment.loan_id)
-                .join(Investor, Investment.investor_id == Investor.investor_id)
-                .join(User, Investor.user_id == User.user_id)
-                .options(
-                    selectinload(Payment.loan)
-                    .selectinload(Loan.investments)
-                    .selectinload(Investment.investor)
-                    .selectinload(Investor.user)
+    def _investor_pending_payments_query():
+        return (
+            select(Payment, Loan, Investment, Investor, User)
+            .join(Loan, Payment.loan_id == Loan.loan_id)
+            .join(Borrower, Payment.borrower_id == Borrower.borrower_id)
+            .join(Investment, Loan.loan_id == Investment.loan_id)
+            .join(Investor, Investment.investor_id == Investor.investor_id)
+            .join(User, Investor.user_id == User.user_id)
+            .options(
+                selectinload(Payment.loan)
+                .selectinload(Loan.investments)
+                .selectinload(Investment.investor)
+                .selectinload(Investor.user)
+            )
+            .where(
+                Payment.status == "payed",
+                Payment.status_payment_investor == "pending"
+            )
+        )
+
+    @staticmethod
+    def _pending_payment_fields(payment) -> dict:
+        return dict(
+            payment_id=payment.Payment.payment_id,
+            loan_id=payment.Payment.loan_id,
+            borrower_id=payment.Payment.borrower_id,
+            installment_number=payment.Payment.installment_number,
+            amount=payment.Payment.amount,
+            due_date=payment.Payment.due_date,
+            status=payment.Payment.status,
+            status_payment_investor=payment.Payment.status_payment_investor,
+            investor_profit=payment.Payment.investor_profit,
+            loan=dict(
+                loan_id=payment.Loan.loan_id,
+                borrower_id=payment.Loan.borrower_id,
+                amount=payment.Loan.amount,
+                interest_rate=payment.Loan.interest_rate,
+                duration=payment.Loan.duration,
+                status=payment.Loan.status,
+                goals=payment.Loan.goals,
+                risk_score=30,
+                investor_profit=payment.Loan.investor_profit,
+                user=dict(
+                    user_id=payment.User.user_id,
+                    name=payment.User.name,
+                    email=payment.User.email,
+                    cpf=payment.User.cpf
                 )
-                .where(
-                    Payment.status == "payed",
-                    Payment.status_payment_investor == "pending"
+            ),
+            investment=dict(
+                investment_id=payment.Investment.investment_id,
+                loan_id=payment.Investment.loan_id,
+                amount=payment.Investment.amount,
+                investor_id=payment.Investment.investor_id,
+                investor=dict(
+                    user_id=payment.Investor.user_id,
+                    name=payment.Investor.user.name,
+                    email=payment.Investor.user.email,
+                    cpf=payment.Investor.user.cpf
                 )
             )
+        )
 
-            result = await db.execute(stmt)
+    @staticmethod
+    async def get_investor_pending_payments(db: AsyncSession) -> list[PaymentResponseDetailed]:
+        try:
+            result = await db.execute(PaymentCRUD._investor_pending_payments_query())
             payments = result.all()
 
-            return [
-                PaymentResponseDetailed(
-                    payment_id=payment.Payment.payment_id,
-                    loan_id=payment.Payment.loan_id,
-                    borrower_id=payment.Payment.borrower_id,
-                    installment_number=payment.Payment.installment_number,
-                    amount=payment.Payment.amount,
-                    due_date=payment.Payment.due_date,
-                    status=payment.Payment.status,
-                    status_payment_investor=payment.Payment.status_payment_investor,
-                    investor_profit=payment.Payment.investor_profit,
-                    loan=LoanResponsePersonalizated(
-                        loan_id=payment.Loan.loan_id,
-                        borrower_id=payment.Loan.borrower_id,
-                        amount=payment.Loan.amount,
-                        interest_rate=payment.Loan.interest_rate,
-                        duration=payment.Loan.duration,
-                        status=payment.Loan.status,
-                        goals=payment.Loan.goals,
-                        risk_score=30,
-                        investor_profit=payment.Loan.investor_profit,
-                        user=UserResponse(
-                            user_id=payment.User.user_id,
-                            name=payment.User.name,
-                            email=payment.User.email,
-                            cpf=payment.User.cpf
-                        )
-                    ),
-                    investment=InvestmentResponse(
-                        investment_id=payment.Investment.investment_id,
-                        loan_id=payment.Investment.loan_id,
-                        amount=payment.Investment.amount,
-                        investor_id=payment.Investment.investor_id,
-                        investor=UserResponse(
-                            user_id=payment.Investor.user_id,
-                            name=payment.Investor.user.name,
-                            email=payment.Investor.user.email,
-                            cpf=payment.Investor.user.cpf
-                        )
-                    )
-                )
-                for payment in payments
-            ]
+            return validate_list(PaymentResponseDetailed, (PaymentCRUD._pending_payment_fields(payment) for payment in payments))
 
         except SQLAlchemyError as e:
             print(e)
@@ -234,4 +401,11 @@ class PaymentCRUD:
 
         except Exception as e:
             print(e)
-            raise HTTPException(status_code=400, detail="Error fetching investor pending payments")    
\ No newline at end of file
+            raise HTTPException(status_code=400, detail="Error fetching investor pending payments")
+
+    @staticmethod
+    async def stream_investor_pending_payments(db: AsyncSession) -> AsyncIterator[PaymentResponseDetailed]:
+        query = PaymentCRUD._investor_pending_payments_query()
+        result = await db.stream(query.execution_options(yield_per=get_settings().pagination.stream_yield_per))
+        async for payment in result:
+            yield PaymentResponseDetailed.model_validate(PaymentCRUD._pending_payment_fields(payment))
@@ -0,0 +1,67 @@
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.helpers.cache import TTLCache
+from app.models import Borrower, Investor
+
+# (borrower_id, investor_id) por user_id. Borrower e Investor são criados pelo
+# serviço de autenticação no cadastro e praticamente nunca mudam depois disso.
+# Este serviço não grava essas tabelas, então nada aqui chama `invalidate` numa
+# mudança de papel: ela só é vista quando a entrada expira (até
+# `identity_cache_ttl_secs`, ou `identity_missing_role_ttl_secs` para papel ausente)
+_IDENTITY_CACHE = TTLCache(
+    max_size=get_settings().security.identity_cache_max_size,
+    ttl=get_settings().security.identity_cache_ttl_secs,
+)
+
+
+class IdentityContext(NamedTuple):
+    """Papéis do usuário autenticado, resolvidos uma vez por requisição."""
+
+    user_id: str
+    borrower_id: Optional[int]
+    investor_id: Optional[int]
+    is_admin: bool = False
+
+
+class IdentityCRUD:
+
+    @staticmethod
+    async def resolve(db: AsyncSession, user_id: str, is_admin: bool = False) -> IdentityContext:
+        roles = _IDENTITY_CACHE.get(user_id)
+        if roles is None:
+            # Os dois papéis em uma única ida ao banco
+            result = await db.execute(
+                select(
+                    select(Borrower.borrower_id).where(Borrower.user_id == user_id).limit(1).scalar_subquery(),
+                    select(Investor.investor_id).where(Investor.user_id == user_id).limit(1).scalar_subquery(),
+                )
+            )
+            roles = tuple(result.one())
+
+            # Papel ausente pode ser criado a qualquer momento: guardar por pouco tempo
+            ttl = None if None not in roles else get_settings().security.identity_missing_role_ttl_secs
+            _IDENTITY_CACHE.set(user_id, roles, ttl=ttl)
+
+        borrower_id, investor_id = roles
+        return IdentityContext(user_id, borrower_id, investor_id, is_admin)
+
+    @staticmethod
+    async def from_user(db: AsyncSession, user: dict) -> IdentityContext:
+        return await IdentityCRUD.resolve(db, user["user_id"], bool(user.get("is_admin")))
+
+    @staticmethod
+    def invalidate(user_id: Optional[str] = None) -> None:
+        """
+        Descarta os papéis em cache. Quem criar ou remover Borrower/Investor neste
+        processo deve chamá-lo para o usuário afetado.
+
+        :param user_id: Usuário a descartar; sem ele, o cache inteiro é limpo.
+        """
+        if user_id is None:
+            _IDENTITY_CACHE.clear()
+        else:
+            _IDENTITY_CACHE.pop(user_id)
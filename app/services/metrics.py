@@ -0,0 +1,212 @@
+import asyncio
+import math
+from collections import Counter
+from typing import Dict, Mapping, Optional
+
+from sqlalchemy import delete, func, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database_session
+from app.models import Investment, Loan, LoanDelinquency, Payment, PlatformMetric, PlatformMetricDelta
+from app.schemas.requests import LoanStatusEnum
+from app.schemas.responses import PlatformMetricsResponse
+
+# Status em que o empréstimo já foi desembolsado pelo investidor
+LENT_STATUSES = (LoanStatusEnum.payed.value, LoanStatusEnum.done.value)
+
+# Diferença tolerada entre o valor incremental e o recalculado (soma de floats)
+DRIFT_TOLERANCE = 1e-6
+
+
+class MetricsCRUD:
+    """
+    Agregados da plataforma mantidos incrementalmente.
+
+    Cada mudança de estado de empréstimo, investimento ou parcela grava a sua diferença
+    (contribuição depois - contribuição antes) em `platform_metric_delta`, na mesma
+    transação da mudança. A tabela só recebe inserções, então escritas concorrentes não
+    disputam nenhuma linha; `fold` soma periodicamente as diferenças em `platform_metric`,
+    e a leitura soma as duas tabelas, sem nunca ver um total sem o dado que o originou.
+    Escritas feitas por fora dos serviços geram desvio, corrigido por `rebuild`.
+    """
+
+    @staticmethod
+    def loan_contribution(status: Optional[str], amount: Optional[float], bank_profit: Optional[float]) -> Counter:
+        contribution = Counter()
+        if status is None:
+            return contribution
+        contribution[f"loans_{status}"] += 1
+        if status in LENT_STATUSES:
+            contribution["total_lent"] += amount or 0.0
+            contribution["bank_profit_expected"] += bank_profit or 0.0
+        return contribution
+
+    @staticmethod
+    def payment_contribution(status: Optional[str], principal: Optional[float], bank_profit: Optional[float]) -> Counter:
+        contribution = Counter()
+        if status is None:
+            return contribution
+        if status == "payed":
+            contribution["bank_profit_realized"] += bank_profit or 0.0
+        else:
+            contribution["outstanding_principal"] += principal or 0.0
+        return contribution
+
+    @staticmethod
+    def investment_contribution(amount: float) -> Counter:
+        return Counter({"investments_count": 1, "investments_amount": amount})
+
+    @staticmethod
+    def diff(before: Counter, after: Counter) -> Dict[str, float]:
+        return {name: after[name] - before[name] for name in before.keys() | after.keys()}
+
+    @staticmethod
+    async def apply(db: AsyncSession, deltas: Mapping[str, float]) -> None:
+        """
+        Registra as diferenças dos agregados, sem commit: o chamador confirma junto com a mudança.
+
+        :param deltas: Diferença por métrica; métricas ainda inexistentes são criadas no `fold`.
+        """
+        deltas = [{"name": name, "value": value} for name, value in deltas.items() if value]
+        if deltas:
+            await db.execute(insert(PlatformMetricDelta).values(deltas))
+
+    @staticmethod
+    async def fold(db: AsyncSession) -> None:
+        """
+        Move as diferenças já confirmadas para `platform_metric`, em um único comando.
+
+        Diferenças de transações ainda abertas não são vistas e ficam para a próxima vez.
+        Execuções concorrentes são seguras: cada diferença é apagada (e somada) uma vez só.
+        """
+        moved = delete(PlatformMetricDelta).returning(PlatformMetricDelta.name, PlatformMetricDelta.value).cte("moved")
+        totals = select(moved.c.name, func.sum(moved.c.value)).group_by(moved.c.name).order_by(moved.c.name)
+        stmt = insert(PlatformMetric).from_select(["name", "value"], totals).add_cte(moved)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlatformMetric.name],
+            set_={"value": PlatformMetric.value + stmt.excluded.value, "update_time": func.now()},
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    @staticmethod
+    async def run_fold(interval_secs: float) -> None:
+        while True:
+            try:
+                async with database_session.get_async_session() as session:
+                    await MetricsCRUD.fold(session)
+            except Exception as e:
+                print(e)
+            await asyncio.sleep(interval_secs)
+
+    @staticmethod
+    async def set_values(db: AsyncSession, values: Mapping[str, float]) -> None:
+        """
+        Grava valores absolutos (métricas recalculadas por inteiro, como o aging), sem commit.
+
+        Diferenças pendentes da mesma métrica continuam valendo por cima do valor gravado.
+        """
+        if not values:
+            return
+        stmt = insert(PlatformMetric).values(
+            [{"name": name, "value": values[name]} for name in sorted(values)]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlatformMetric.name],
+            set_={"value": stmt.excluded.value, "update_time": func.now()},
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def read(db: AsyncSession) -> Dict[str, float]:
+        # Valores já somados + diferenças ainda não somadas, no mesmo snapshot
+        values = union_all(
+            select(PlatformMetric.name, PlatformMetric.value),
+            select(PlatformMetricDelta.name, PlatformMetricDelta.value),
+        ).subquery()
+        result = await db.execute(select(values.c.name, func.sum(values.c.value)).group_by(values.c.name))
+        return dict(result.all())
+
+    @staticmethod
+    async def compute_from_scratch(db: AsyncSession) -> Dict[str, float]:
+        """Recalcula todas as métricas varrendo as tabelas, com as mesmas definições das contribuições."""
+        metrics: Dict[str, float] = {}
+
+        loans = await db.execute(
+            select(
+                Loan.status,
+                func.count(),
+                func.coalesce(func.sum(Loan.amount), 0.0),
+                func.coalesce(func.sum(Loan.bank_profit), 0.0),
+            ).group_by(Loan.status)
+        )
+        metrics["total_lent"] = metrics["bank_profit_expected"] = 0.0
+        for status, count, amount, bank_profit in loans:
+            metrics[f"loans_{status}"] = float(count)
+            if status in LENT_STATUSES:
+                metrics["total_lent"] += amount
+                metrics["bank_profit_expected"] += bank_profit
+
+        payments = await db.execute(
+            select(
+                func.coalesce(func.sum(Payment.bank_profit).filter(Payment.status == "payed"), 0.0),
+                func.coalesce(func.sum(Payment.principal).filter(Payment.status != "payed"), 0.0),
+            )
+        )
+        metrics["bank_profit_realized"], metrics["outstanding_principal"] = payments.one()
+
+        investments = await db.execute(
+            select(func.count(), func.coalesce(func.sum(Investment.amount), 0.0))
+        )
+        count, amount = investments.one()
+        metrics["investments_count"], metrics["investments_amount"] = float(count), amount
+
+        metrics["overdue_90_plus_amount"] = await db.scalar(
+            select(func.coalesce(func.sum(LoanDelinquency.amount_90_plus), 0.0))
+        )
+        return metrics
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, apply: bool = True) -> Dict[str, tuple]:
+        """
+        Recalcula os agregados do zero e compara com os valores incrementais.
+
+        :param apply: Se verdadeiro, substitui a tabela pelos valores recalculados.
+        :return: Métricas divergentes, como {nome: (incremental, recalculado)}.
+        """
+        expected = await MetricsCRUD.compute_from_scratch(db)
+        current = await MetricsCRUD.read(db)
+
+        drift = {}
+        for name in sorted(expected.keys() | current.keys()):
+            stored, computed = current.get(name, 0.0), expected.get(name, 0.0)
+            if not math.isclose(stored, computed, rel_tol=DRIFT_TOLERANCE, abs_tol=DRIFT_TOLERANCE):
+                drift[name] = (stored, computed)
+
+        if apply:
+            # Os valores recalculados já incluem as diferenças pendentes; métricas que não
+            # existem mais (status sem empréstimos) voltam a zero
+            await db.execute(delete(PlatformMetricDelta))
+            await MetricsCRUD.set_values(db, {name: expected.get(name, 0.0) for name in expected.keys() | current.keys()})
+            await db.commit()
+        return drift
+
+    @staticmethod
+    async def get_platform_metrics(db: AsyncSession) -> PlatformMetricsResponse:
+        metrics = await MetricsCRUD.read(db)
+        outstanding = metrics.get("outstanding_principal", 0.0)
+        overdue_90_plus = metrics.get("overdue_90_plus_amount", 0.0)
+        return PlatformMetricsResponse(
+            total_lent=metrics.get("total_lent", 0.0),
+            bank_profit_expected=metrics.get("bank_profit_expected", 0.0),
+            bank_profit_realized=metrics.get("bank_profit_realized", 0.0),
+            outstanding_principal=outstanding,
+            overdue_90_plus_amount=overdue_90_plus,
+            default_rate=overdue_90_plus / outstanding if outstanding > 0 else 0.0,
+            investments=int(metrics.get("investments_count", 0)),
+            invested_amount=metrics.get("investments_amount", 0.0),
+            loans_by_status={
+                status.value: int(metrics.get(f"loans_{status.value}", 0)) for status in LoanStatusEnum
+            },
+        )
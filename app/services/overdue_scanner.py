@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, select, true, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database_session
+from app.core.config import get_settings
+from app.models import LoanDelinquency, Payment
+from app.services.metrics import MetricsCRUD
+
+# Faixas de aging: coluna de LoanDelinquency e dias de atraso (acima de, até; None = sem limite)
+AGING_BUCKETS = [
+    ("amount_1_30", 0, 30),
+    ("amount_31_60", 30, 60),
+    ("amount_61_90", 60, 90),
+    ("amount_90_plus", 90, None),
+]
+
+
+class OverdueScanner:
+    """
+    Job periódico que move parcelas vencidas de `pending` para `overdue` e mantém o aging por empréstimo.
+
+    Cada lote lê as pendentes vencidas pelo índice parcial de pendentes, que só contém as
+    parcelas ainda em aberto, então reler desde o início a cada execução é barato e uma
+    parcela que volte para `pending` é marcada de novo. Vários workers podem rodar ao mesmo
+    tempo: linhas travadas por outro worker são puladas (SKIP LOCKED) e a varredura só
+    termina quando um lote volta vazio; o aging é um upsert idempotente.
+
+    :param batch_size: Parcelas marcadas por transação.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or get_settings().jobs.overdue_scan_batch_size
+
+    async def mark_overdue(self, db: AsyncSession, now: datetime) -> int:
+        marked = 0
+        while True:
+            batch = (
+                select(Payment.payment_id)
+                .where(Payment.status == "pending", Payment.due_date < now)
+                .order_by(Payment.due_date, Payment.payment_id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .cte("batch")
+            )
+
+            result = await db.execute(
+                update(Payment)
+                .where(Payment.payment_id == batch.c.payment_id)
+                .values(status="overdue")
+                .returning(Payment.payment_id)
+            )
+            rows = result.all()
+            await db.commit()
+
+            if not rows:
+                return marked
+            marked += len(rows)
+
+    async def refresh_aging(self, db: AsyncSession, now: datetime) -> None:
+        """
+        Recalcula as faixas de todos os empréstimos com parcelas em atraso.
+
+        O atraso de cada parcela cresce a cada dia, então as faixas são recalculadas
+        (e não só incrementadas); o custo é proporcional às parcelas em atraso, lidas
+        pelo índice parcial de `overdue`, e não ao tamanho da tabela.
+        """
+        def bucket(low_days: int, high_days: Optional[int]):
+            condition = true()
+            if low_days:
+                condition = condition & (Payment.due_date < now - timedelta(days=low_days))
+            if high_days is not None:
+                condition = condition & (Payment.due_date >= now - timedelta(days=high_days))
+            return func.coalesce(func.sum(Payment.amount).filter(condition), 0.0)
+
+        aging = (
+            select(
+                Payment.loan_id,
+                func.count().label("overdue_installments"),
+                func.sum(Payment.amount).label("overdue_amount"),
+                *(bucket(low, high).label(name) for name, low, high in AGING_BUCKETS),
+                func.min(Payment.due_date).label("oldest_due_date"),
+            )
+            .where(Payment.status == "overdue")
+            .group_by(Payment.loan_id)
+        )
+        columns = [column.name for column in aging.selected_columns]
+
+        upsert = insert(LoanDelinquency).from_select(columns, aging)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[LoanDelinquency.loan_id],
+            set_={
+                **{name: upsert.excluded[name] for name in columns if name != "loan_id"},
+                "update_time": func.now(),
+            },
+        )
+        await db.execute(upsert)
+
+        # Empréstimos que não têm mais parcelas em atraso saem do aging
+        await db.execute(
+            delete(LoanDelinquency).where(
+                ~exists().where(Payment.loan_id == LoanDelinquency.loan_id, Payment.status == "overdue")
+            )
+        )
+
+        # Inadimplência 90+ da plataforma, sobre a tabela de aging (uma linha por empréstimo em atraso)
+        overdue_90_plus = await db.scalar(select(func.coalesce(func.sum(LoanDelinquency.amount_90_plus), 0.0)))
+        await MetricsCRUD.set_values(db, {"overdue_90_plus_amount": overdue_90_plus})
+        await db.commit()
+
+    async def scan(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        marked = await self.mark_overdue(db, now)
+        await self.refresh_aging(db, now)
+        return marked
+
+    async def run(self, interval_secs: float) -> None:
+        while True:
+            try:
+                async with database_session.get_async_session() as session:
+                    await self.scan(session)
+            except Exception as e:
+                print(e)
+            await asyncio.sleep(interval_secs)
@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select
+from sqlalchemy import delete, select, tuple_, update
 from sqlalchemy.orm import selectinload
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,26 +8,32 @@ from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 from app.models import Investment, Investor, Loan, Borrower, RiskProfile, User
-from app.schemas.requests import LoanRequest, LoanStatusEnum, LoanUpdateRequest
-from app.schemas.responses import LoanResponse, LoanResponsePersonalizated, UserResponse
-from typing import List
+from app.schemas.requests import LoanListParams, LoanRequest, LoanStatusEnum, LoanUpdateRequest
+from app.schemas.responses import LoanResponse, LoanResponsePersonalizated, Page
+from typing import List, Optional
+from pydantic import AwareDatetime
+from collections import Counter
 
 from app.services.crud_investment import InvestmentCRUD
+from app.services.identity import IdentityContext, IdentityCRUD
+from app.services.metrics import MetricsCRUD
 from app.helpers.p2p_utils import ProfitCalculator
+from app.helpers.pagination import decode_cursor, encode_cursor, resolve_page_size
+from app.helpers.serialization import validate_list
 
 class LoanCRUD:
     
     @staticmethod
-    async def create_loan(db: AsyncSession, loan_in: LoanRequest, user: User) -> LoanResponse:
+    async def create_loan(db: AsyncSession, loan_in: LoanRequest, user: User, identity: Optional[IdentityContext] = None) -> LoanResponse:
         try:
-            borrower = await db.scalar(select(Borrower).where(Borrower.user_id == user["user_id"]))
-            if not borrower:
+            identity = identity or await IdentityCRUD.from_user(db, user)
+            if identity.borrower_id is None:
                 raise HTTPException(status_code=404, detail="Borrower not found")
             
             bank_profit, investor_profit, monthly_payment  = ProfitCalculator.calculate_profits(loan_in.amount, loan_in.interest_rate, loan_in.duration)
 
             loan = Loan(
-                borrower_id=borrower.borrower_id,
+                borrower_id=identity.borrower_id,
                 amount=loan_in.amount,
                 interest_rate=loan_in.interest_rate,
                 duration=loan_in.duration,
@@ -37,6 +43,7 @@ class LoanCRUD:
                 investor_profit=investor_profit
             )
             db.add(loan)
+            await MetricsCRUD.apply(db, MetricsCRUD.loan_contribution(loan.status, loan.amount, loan.bank_profit))
             await db.commit()
             await db.refresh(loan)
             
@@ -60,38 +67,80 @@ class LoanCRUD:
             print(e)
             raise HTTPException(status_code=400, detail="Error creating loan")
 
+    @staticmethod
+    def _loan_fields(loan) -> dict:
+        return dict(
+            loan_id=loan.Loan.loan_id,
+            borrower_id=loan.Loan.borrower_id,
+            amount=loan.Loan.amount,
+            interest_rate=loan.Loan.interest_rate,
+            duration=loan.Loan.duration,
+            status=loan.Loan.status,
+            goals=loan.Loan.goals,
+            risk_score=loan.RiskProfile.risk_score,
+            investor_profit=loan.Loan.investor_profit,
+            user=dict(
+                user_id=loan.User.user_id,
+                name=loan.User.name,
+                email=loan.User.email,
+                cpf=loan.User.cpf,
+            )
+        )
+
     @staticmethod   
-    async def list_loans(db: AsyncSession) -> List[LoanResponsePersonalizated]:
+    async def list_loans(db: AsyncSession, params: Optional[LoanListParams] = None) -> Page[LoanResponsePersonalizated]:
+        params = params or LoanListParams()
         try:
-            result = await db.execute(
+            page_size = resolve_page_size(params.page_size)
+            query = (
                 select(Loan, Borrower, User, RiskProfile)
                 .join(Borrower, Loan.borrower_id == Borrower.borrower_id)
                 .join(User, Borrower.user_id == User.user_id)
                 .join(RiskProfile, RiskProfile.borrower_id == Borrower.borrower_id)
             )
+
+            if params.status is not None:
+                query = query.where(Loan.status == params.status.value)
+            if params.goals is not None:
+                query = query.where(Loan.goals == params.goals)
+            if params.min_amount is not None:
+                query = query.where(Loan.amount >= params.min_amount)
+            if params.max_amount is not None:
+                query = query.where(Loan.amount <= params.max_amount)
+            if params.min_interest_rate is not None:
+                query = query.where(Loan.interest_rate >= params.min_interest_rate)
+            if params.max_interest_rate is not None:
+                query = query.where(Loan.interest_rate <= params.max_interest_rate)
+            if params.min_risk_score is not None:
+                query = query.where(RiskProfile.risk_score >= params.min_risk_score)
+            if params.max_risk_score is not None:
+                query = query.where(RiskProfile.risk_score <= params.max_risk_score)
+
+            # Paginação por chave (create_time, loan_id), dos mais recentes para os mais antigos
+            if params.cursor:
+                try:
+                    create_time, loan_id = decode_cursor(params.cursor, AwareDatetime, int)
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+                query = query.where(tuple_(Loan.create_time, Loan.loan_id) < tuple_(create_time, loan_id))
+
+            result = await db.execute(
+                query.order_by(Loan.create_time.desc(), Loan.loan_id.desc()).limit(page_size + 1)
+            )
             loans = result.all()
 
-            return [
-                LoanResponsePersonalizated(
-                    loan_id=loan.Loan.loan_id,
-                    borrower_id=loan.Loan.borrower_id,
-                    amount=loan.Loan.amount,
-                    interest_rate=loan.Loan.interest_rate,
-                    duration=loan.Loan.duration,
-                    status=loan.Loan.status,
-                    goals=loan.Loan.goals,
-                    risk_score=loan.RiskProfile.risk_score,
-                    investor_profit=loan.Loan.investor_profit,
-                    user=UserResponse(
-                        user_id=loan.User.user_id,
-                        name=loan.User.name,
-                        email=loan.User.email,
-                        cpf=loan.User.cpf,
-                    )
-                )
-                for loan in loans
-            ]
-        
+            next_cursor = None
+            if len(loans) > page_size:
+                loans = loans[:page_size]
+                last = loans[-1].Loan
+                next_cursor = encode_cursor(last.create_time, last.loan_id)
+
+            items = validate_list(LoanResponsePersonalizated, (LoanCRUD._loan_fields(loan) for loan in loans))
+            return Page[LoanResponsePersonalizated](items=items, next_cursor=next_cursor)
+
+        except HTTPException:
+            raise
+
         except Exception as e:
             print(e)
             raise HTTPException(status_code=500, detail="Error retrieving loans")
@@ -106,6 +155,9 @@ class LoanCRUD:
                 raise HTTPException(status_code=404, detail="Loan not found")
             
             await db.delete(loan)
+            await MetricsCRUD.apply(
+                db, MetricsCRUD.diff(MetricsCRUD.loan_contribution(loan.status, loan.amount, loan.bank_profit), Counter())
+            )
             await db.commit()
         
         except Exception as e:
@@ -122,12 +174,15 @@ class LoanCRUD:
             if not loan:
                 raise HTTPException(status_code=404, detail="Loan not found")
             
+            before = MetricsCRUD.loan_contribution(loan.status, loan.amount, loan.bank_profit)
             loan.amount = loan_in.amount
             loan.interest_rate = loan_in.interest_rate
             loan.duration = loan_in.duration
             loan.status = loan_in.status
             loan.goals = loan_in.goals
 
+            after = MetricsCRUD.loan_contribution(loan.status, loan.amount, loan.bank_profit)
+            await MetricsCRUD.apply(db, MetricsCRUD.diff(before, after))
             await db.commit()
             await db.refresh(loan)
 
@@ -147,29 +202,16 @@ class LoanCRUD:
             raise HTTPException(status_code=500, detail="Error updating loan")
 
     @staticmethod
-    async def list_user_loans(db: AsyncSession, user_id: int) -> List[LoanResponse]:
+    async def list_user_loans(db: AsyncSession, user_id: int, identity: Optional[IdentityContext] = None) -> List[LoanResponse]:
         try:
-            
-            result = await db.execute(select(Borrower).where(Borrower.user_id == user_id))
-            borrower = result.scalar_one_or_none()
-
-            if not borrower:
+            identity = identity or await IdentityCRUD.resolve(db, user_id)
+            if identity.borrower_id is None:
                 raise HTTPException(status_code=404, detail="Borrower not found")
 
-            
-            result = await db.execute(select(Loan).where(Loan.borrower_id == borrower.borrower_id))
+            result = await db.execute(select(Loan).where(Loan.borrower_id == identity.borrower_id))
             loans = result.scalars().all()
 
-            return [LoanResponse(
-                loan_id=loan.loan_id,
-                borrower_id=loan.borrower_id,
-                amount=loan.amount,
-                interest_rate=loan.interest_rate,
-                duration=loan.duration,
-                status=loan.status,
-                goals=loan.goals,
-                investor_profit=loan.investor_profit
-            ) for loan in loans]
+            return validate_list(LoanResponse, loans, from_attributes=True)
         
         except HTTPException:
             raise
@@ -180,40 +222,60 @@ class LoanCRUD:
     @staticmethod
     async def update_loan_status(db: AsyncSession, loan_id: int, new_status: LoanStatusEnum) -> LoanResponse:
         try:
-            # Buscar o empréstimo pelo ID
-            result = await db.execute(select(Loan).where(Loan.loan_id == loan_id))
-            loan = result.scalar_one_or_none()
-            
-            if not loan:
-                raise HTTPException(status_code=404, detail="Loan not found")
-            
-            # Atualizar o status do empréstimo
-            loan.status = new_status.value
+            # Atualizar o status com compare-and-set: entre cliques concorrentes,
+            # apenas um consegue liquidar o empréstimo. O status anterior vem de uma
+            # CTE travada para ajustar as métricas
+            old = select(Loan.loan_id, Loan.status).where(Loan.loan_id == loan_id)
+            if new_status == LoanStatusEnum.payed:
+                old = old.where(Loan.status != LoanStatusEnum.payed.value)
+            old = old.with_for_update().cte("old")
+            row = (
+                await db.execute(
+                    update(Loan)
+                    .where(Loan.loan_id == old.c.loan_id)
+                    .values(status=new_status.value)
+                    .returning(Loan, old.c.status)
+                )
+            ).one_or_none()
 
-            # Commit para persistir a atualização do status
-            await db.commit()
-            await db.refresh(loan)
+            if not row:
+                loan_exists = await db.scalar(select(Loan.loan_id).where(Loan.loan_id == loan_id))
+                if not loan_exists:
+                    raise HTTPException(status_code=404, detail="Loan not found")
+                raise HTTPException(status_code=409, detail="Loan already payed")
+
+            loan, previous_status = row
+            await MetricsCRUD.apply(
+                db,
+                MetricsCRUD.diff(
+                    MetricsCRUD.loan_contribution(previous_status, loan.amount, loan.bank_profit),
+                    MetricsCRUD.loan_contribution(loan.status, loan.amount, loan.bank_profit),
+                ),
+            )
 
             # Verificar se o novo status é 'payed' para gerar contrato e pagamentos
             if new_status == LoanStatusEnum.payed:
-                # Buscar o investimento relacionado a este empréstimo
-                result_investment = await db.execute(select(Investment).where(Investment.loan_id == loan_id))
-                investment_in = result_investment.scalar_one_or_none()
+                # Buscar o investimento e o investidor em uma única consulta
+                result_investment = await db.execute(
+                    select(Investment.amount, Investor.investor_id)
+                    .join(Investor, Investment.investor_id == Investor.investor_id)
+                    .where(Investment.loan_id == loan_id)
+                )
+                investment_in = result_investment.one_or_none()
                 if not investment_in:
                     raise HTTPException(status_code=404, detail="Investment not found")
 
-                result_investor = await db.execute(select(Investor).where(Investor.investor_id == investment_in.investor_id))
-                investor = result_investor.scalar_one_or_none()
-                if not investor:
-                    raise HTTPException(status_code=404, detail="Investor not found")
-
-                # Gerar contrato
-                await InvestmentCRUD.generate_contract(db, loan, investor)
+                # Contrato e pagamentos na mesma transação da mudança de status
+                await InvestmentCRUD.generate_contract(db, loan, investment_in.investor_id, commit=False)
+                await InvestmentCRUD.generate_payments(db, loan, investment_in.amount, commit=False)
 
-                # Gerar pagamentos
-                await InvestmentCRUD.generate_payments(db, loan, investment_in.amount)
+            await db.commit()
 
             return LoanResponse.from_orm(loan)
+
+        except HTTPException:
+            await db.rollback()
+            raise
         
         except SQLAlchemyError as e:
             await db.rollback()
@@ -221,4 +283,4 @@ class LoanCRUD:
         
         except Exception as e:
             await db.rollback()
-            raise HTTPException(status_code=500, detail="Error updating loan status") 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail="Error updating loan status") 
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import get_settings
+from app.core.http_client import UPSTREAM_STOCKS, get_http_client
+from app.helpers.cache import SingleFlight, TTLCache
+
+# (buscado_em, resumo) por símbolo. A entrada vive pelo tempo fresco + o tempo em que
+# ainda pode ser servida velha; o frescor é decidido pela idade em `get_summary`
+_SUMMARY_CACHE = TTLCache(
+    max_size=get_settings().stocks.summary_cache_max_size,
+    ttl=get_settings().stocks.summary_ttl_secs + get_settings().stocks.summary_stale_secs,
+)
+# Uma única chamada ao upstream por símbolo, seja por falta no cache ou revalidação
+_SUMMARY_FETCHES = SingleFlight()
+# Revalidações em segundo plano; a referência evita que a task seja coletada
+_REFRESH_TASKS: set[asyncio.Task] = set()
+
+
+class StockSummaryStats:
+    """Contadores do cache e latência das chamadas ao upstream, desde o início do processo."""
+
+    # Latências guardadas para os percentis
+    WINDOW = 1024
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.latencies: deque[float] = deque(maxlen=self.WINDOW)
+
+    def observe_upstream(self, elapsed: float, failed: bool) -> None:
+        self.upstream_calls += 1
+        self.upstream_errors += failed
+        self.latencies.append(elapsed)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 3)
+
+        return {
+            "cache": {
+                "size": len(_SUMMARY_CACHE),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else None,
+            },
+            "upstream": {
+                "calls": self.upstream_calls,
+                "errors": self.upstream_errors,
+                "in_flight": len(_SUMMARY_FETCHES),
+                "latency_ms_p50": percentile(0.5),
+                "latency_ms_p95": percentile(0.95),
+                "latency_ms_max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+        }
+
+
+_STATS = StockSummaryStats()
+
+
+class StockSummaryCache:
+
+    @staticmethod
+    async def _fetch(symbol: str) -> Any:
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await get_http_client(UPSTREAM_STOCKS).get(f"/stocks/stock-summary/{symbol}")
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            summary = response.json()
+            failed = False
+        finally:
+            _STATS.observe_upstream(time.perf_counter() - started, failed)
+
+        _SUMMARY_CACHE.set(symbol, (time.monotonic(), summary))
+        return summary
+
+    @staticmethod
+    async def _revalidate(symbol: str) -> None:
+        try:
+            await _SUMMARY_FETCHES.do(symbol, lambda: StockSummaryCache._fetch(symbol))
+        except Exception as e:
+            # O valor velho continua sendo servido até expirar de vez
+            print(e)
+
+    @staticmethod
+    async def get_summary(symbol: str) -> Any:
+        """
+        Resumo da ação, com stale-while-revalidate.
+
+        Dentro de `summary_ttl_secs` o valor em cache é devolvido direto; depois, por mais
+        `summary_stale_secs`, o valor velho é devolvido e uma única revalidação roda em
+        segundo plano. Sem valor utilizável, a requisição espera a chamada ao upstream,
+        compartilhada com as requisições concorrentes do mesmo símbolo.
+
+        :raises HTTPException: 500 se o upstream falhar e não houver valor em cache;
+            503 se o circuito do upstream estiver aberto.
+        """
+        entry = _SUMMARY_CACHE.get(symbol)
+        if entry is not None:
+            fetched_at, summary = entry
+            if time.monotonic() - fetched_at < get_settings().stocks.summary_ttl_secs:
+                _STATS.hits += 1
+            else:
+                _STATS.stale_hits += 1
+                task = asyncio.create_task(StockSummaryCache._revalidate(symbol))
+                _REFRESH_TASKS.add(task)
+                task.add_done_callback(_REFRESH_TASKS.discard)
+            return summary
+
+        _STATS.misses += 1
+        try:
+            return await _SUMMARY_FETCHES.do(symbol, lambda: StockSummaryCache._fetch(symbol))
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPError as e:
+            print(e)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    async def get_summaries(symbols: list[str]) -> tuple[dict, dict]:
+        """
+        Resumos de vários símbolos, buscados em paralelo com no máximo
+        `batch_concurrency` chamadas simultâneas.
+
+        :return: (resumos por símbolo, erro por símbolo que falhou).
+        """
+        semaphore = asyncio.Semaphore(get_settings().stocks.batch_concurrency)
+
+        async def one(symbol: str) -> Any:
+            async with semaphore:
+                return await StockSummaryCache.get_summary(symbol)
+
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(one(symbol) for symbol in symbols), return_exceptions=True)
+
+        summaries, errors = {}, {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, HTTPException):
+                errors[symbol] = result.detail
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                summaries[symbol] = result
+        return summaries, errors
+
+    @staticmethod
+    def stats() -> dict:
+        return _STATS.snapshot()
+
+    @staticmethod
+    def clear() -> None:
+        _SUMMARY_CACHE.clear()
+        _STATS.reset()
@@ -12,10 +12,13 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
+from app.api.deps import admin_required, get_current_user
 from app.core import database_session
 from app.core.config import get_settings
 from app.main import app as fastapi_app
 from app.models import Base, Contract, Loan, User, Borrower, Investor
+from app.services.identity import IdentityCRUD
+from app.services.stock_summary import StockSummaryCache
 
 default_user_id = "b75365d9-7bf9-4f54-add5-aeab333a087b"
 default_user_email = "geralt@wiedzmin.pl"
@@ -106,6 +109,22 @@ async def fixture_clean_get_settings_between_tests() -> AsyncGenerator[None, Non
     get_settings.cache_clear()
 
 
+@pytest.fixture(scope="function", autouse=True)
+def fixture_clean_identity_cache_between_tests() -> Generator[None, None, None]:
+    # borrower/investor ids change between tests, the rows are rolled back
+    yield
+
+    IdentityCRUD.invalidate()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def fixture_clean_stock_summary_cache_between_tests() -> Generator[None, None, None]:
+    # upstream responses are mocked per test
+    yield
+
+    StockSummaryCache.clear()
+
+
 @pytest_asyncio.fixture(name="default_hashed_password", scope="session")
 async def fixture_default_hashed_password() -> str:
     return get_password_hash(default_user_password)
@@ -121,7 +140,13 @@ async def fixture_session_with_rollback(
     connection = await database_session._ASYNC_ENGINE.connect()
     transaction = await connection.begin()
 
-    session = AsyncSession(bind=connection, expire_on_commit=False)
+    # commit/rollback inside the code under test only touch a savepoint,
+    # the outer transaction is rolled back after the test
+    session = AsyncSession(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
 
     monkeypatch.setattr(
         database_session,
@@ -183,6 +208,16 @@ async def fixture_default_user(
 def fixture_default_user_headers(default_user: User) -> dict[str, str]:
     return {"Authorization": f"Bearer {default_user_access_token}"}
 
+@pytest.fixture(name="authenticated_admin", scope="function")
+def fixture_authenticated_admin(default_user: dict) -> Generator[dict, None, None]:
+    # skip the auth microservice, requests run as the default user with admin rights
+    admin_user = {**default_user, "is_admin": True}
+    fastapi_app.dependency_overrides[get_current_user] = lambda: admin_user
+    fastapi_app.dependency_overrides[admin_required] = lambda: admin_user
+    yield admin_user
+    fastapi_app.dependency_overrides.pop(get_current_user, None)
+    fastapi_app.dependency_overrides.pop(admin_required, None)
+
 @pytest_asyncio.fixture(name="default_investor", scope="function")
 async def fixture_default_investor(
     session: AsyncSession, default_user: User
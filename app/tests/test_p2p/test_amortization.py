@@ -0,0 +1,38 @@
+import pytest
+
+from app.helpers.amortization import AmortizationMethod, build_schedule
+from app.helpers.p2p_utils import ProfitCalculator
+
+
+def test_price_schedule_matches_profit_calculator():
+    bank_profit, investor_profit, monthly_payment = ProfitCalculator.calculate_profits(10000.0, 5.0, 12)
+
+    schedule = build_schedule(10000.0, 5.0, 12, AmortizationMethod.price)
+
+    assert len(schedule) == 12
+    assert all(installment.payment == pytest.approx(monthly_payment) for installment in schedule)
+    assert sum(installment.principal for installment in schedule) == pytest.approx(10000.0)
+    assert sum(installment.bank_share for installment in schedule) == pytest.approx(bank_profit)
+    assert sum(installment.investor_share for installment in schedule) == pytest.approx(investor_profit)
+    # juros concentrados no início da Tabela Price
+    assert schedule[0].interest > schedule[-1].interest
+    assert schedule[-1].balance == 0.0
+
+
+def test_sac_schedule_has_constant_principal():
+    schedule = build_schedule(12000.0, 1.0, 12, AmortizationMethod.sac)
+
+    assert all(installment.principal == pytest.approx(1000.0) for installment in schedule)
+    assert schedule[0].payment == pytest.approx(1120.0)
+    assert schedule[-1].payment == pytest.approx(1010.0)
+    assert schedule[5].balance == pytest.approx(6000.0)
+
+
+def test_schedule_is_memoized():
+    build_schedule.cache_clear()
+
+    first = build_schedule(5000.0, 2.0, 24)
+    second = build_schedule(5000.0, 2.0, 24)
+
+    assert first is second
+    assert build_schedule.cache_info().hits == 1
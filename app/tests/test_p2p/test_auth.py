@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+from fastapi import HTTPException, status
+
+from app.api import deps
+from app.core import http_client
+from app.core.config import get_settings
+from app.core.security import JWT_ALGORITHM
+from app.helpers.cache import TTLCache
+from app.tests.conftest import default_user_id
+
+
+def create_access_token(subject: str = default_user_id, expires_in: int = 3600) -> str:
+    security = get_settings().security
+    return jwt.encode(
+        {"iss": security.jwt_issuer, "sub": subject, "exp": int(time.time()) + expires_in},
+        security.jwt_secret_key.get_secret_value(),
+        algorithm=JWT_ALGORITHM,
+    )
+
+
+@pytest.fixture(name="remote_calls")
+def fixture_remote_calls(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls = []
+
+    async def fake_fetch_remote_user(token: str) -> dict:
+        calls.append(token)
+        await asyncio.sleep(0.01)
+        if jwt.decode(token, options={"verify_signature": False})["sub"] != default_user_id:
+            raise HTTPException(status_code=401, detail="Token is invalid or expired")
+        return {"user_id": default_user_id, "is_admin": False}
+
+    monkeypatch.setattr(deps, "_fetch_remote_user", fake_fetch_remote_user)
+    deps._USER_CACHE.clear()
+    deps._AUTH_FAILURE_CACHE.clear()
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_remote_profile(remote_calls: list[str]) -> None:
+    token = create_access_token()
+
+    first = await deps.get_current_user(token)
+    second = await deps.get_current_user(token)
+
+    assert first == second == {"user_id": default_user_id, "is_admin": False}
+    assert remote_calls == [token]
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_invalid_token_locally(remote_calls: list[str]) -> None:
+    token = create_access_token(expires_in=-10)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_current_user(token)
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert remote_calls == []
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_coalesces_concurrent_lookups(remote_calls: list[str]) -> None:
+    token = create_access_token()
+
+    users = await asyncio.gather(*(deps.get_current_user(token) for _ in range(4)))
+
+    assert all(user["user_id"] == default_user_id for user in users)
+    assert remote_calls == [token]
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_remote_rejection(remote_calls: list[str]) -> None:
+    token = create_access_token(subject="removed-user")
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc_info:
+            await deps.get_current_user(token)
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+    assert remote_calls == [token]
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_auth_outage_is_not_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings().http, "retry_backoff_base_secs", 0.0)
+    outage = [True]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if outage[0]:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"user_id": default_user_id, "is_admin": False})
+
+    http_client.set_transport(httpx.MockTransport(handler))
+    deps._USER_CACHE.clear()
+    deps._AUTH_FAILURE_CACHE.clear()
+    token = create_access_token()
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await deps.get_current_user(token)
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        outage[0] = False
+        assert (await deps.get_current_user(token))["user_id"] == default_user_id
+    finally:
+        http_client.set_transport(None)
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used() -> None:
+    now = [0.0]
+    cache = TTLCache(max_size=2, ttl=10, timer=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.get("c") is None
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.core import http_client
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState, ResilientTransport
+from app.core.config import get_settings
+from app.main import app
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_circuit_breaker_opens_and_probes_after_timeout() -> None:
+    timer = FakeTimer()
+    breaker = CircuitBreaker("stocks", failure_threshold=2, reset_timeout=10, timer=timer)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # half-open: a single probe, a failed probe opens the circuit again
+    timer.now = 10
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+
+    timer.now = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitState.closed
+    assert breaker.snapshot()["rejected_calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_resilient_transport_retries_only_safe_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings().http, "retry_backoff_base_secs", 0.0)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(503)
+
+    breaker = CircuitBreaker("test", failure_threshold=100, reset_timeout=30)
+    async with httpx.AsyncClient(
+        base_url="http://upstream", transport=ResilientTransport(httpx.MockTransport(handler), breaker)
+    ) as client:
+        assert (await client.get("/busy")).status_code == 503
+        assert (await client.post("/busy")).status_code == 503
+        with pytest.raises(httpx.ConnectError):
+            await client.post("/down")
+
+    attempts = get_settings().http.retry_max_attempts
+    # GET 5xx retried, POST 5xx sent once, connect errors retried for any method
+    assert calls == ["GET"] * attempts + ["POST"] + ["POST"] * attempts
+    assert breaker.consecutive_failures == 3
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, authenticated_admin: dict
+) -> None:
+    monkeypatch.setattr(get_settings().http, "retry_max_attempts", 1)
+    monkeypatch.setattr(get_settings().http, "breaker_failure_threshold", 2)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("connection refused")
+
+    http_client.set_transport(httpx.MockTransport(handler))
+    try:
+        for symbol in ["A", "B"]:
+            response = await client.get(app.url_path_for("get_stock_data", symbol=symbol))
+            assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        response = await client.get(app.url_path_for("get_stock_data", symbol="C"))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert len(calls) == 2
+
+        upstreams = (await client.get(app.url_path_for("get_upstream_metrics"))).json()
+        assert upstreams["stocks"]["state"] == "open"
+        assert upstreams["stocks"]["rejected_calls"] == 1
+    finally:
+        http_client.set_transport(None)
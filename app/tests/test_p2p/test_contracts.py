@@ -4,10 +4,10 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import pytest
 from app.models import Contract, Investor, Loan, RiskProfile, User, Borrower
-from app.schemas.requests import LoanRequest, LoanUpdateRequest
+from app.schemas.requests import ContractListParams, LoanRequest, LoanUpdateRequest
 from app.schemas.responses import ContractResponse, LoanResponse
 from app.services.crud_contracts import ContractCRUD
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.main import app
 
 @pytest.mark.asyncio
@@ -31,8 +31,9 @@ async def test_get_user_contracts_no_contracts(
     
     contracts = await ContractCRUD.get_user_contracts(db=session, user=default_user)
 
-    assert isinstance(contracts, list)
-    assert len(contracts) == 0
+    assert isinstance(contracts.items, list)
+    assert len(contracts.items) == 0
+    assert contracts.next_cursor is None
 
 
 @pytest.mark.asyncio
@@ -50,4 +51,43 @@ async def test_get_user_contracts_invalid_user(
     with pytest.raises(HTTPException) as exc_info:
         await ContractCRUD.get_user_contracts(db=session, user=invalid_user)
 
-    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_get_user_contracts_pages_by_date_signed(
+    session: AsyncSession,
+    default_user: dict,
+    default_borrower: Borrower,
+    default_investor: Investor,
+    default_loan: Loan,
+) -> None:
+    session.add(RiskProfile(borrower_id=default_borrower.borrower_id, risk_score=7))
+    signed = datetime(2024, 1, 1)
+    contracts = [
+        Contract(
+            loan_id=default_loan.loan_id,
+            borrower_id=default_borrower.borrower_id,
+            investor_id=default_investor.investor_id,
+            status="active",
+            date_signed=signed + timedelta(days=day),
+            investor_signature_digital_uuid="uuid",
+            borrower_signature_digital_uuid="uuid",
+        )
+        for day in range(3)
+    ]
+    session.add_all(contracts)
+    await session.commit()
+    newest_first = [contract.contract_id for contract in reversed(contracts)]
+
+    # the user is on both sides of every contract: the UNION lists each one once
+    first = await ContractCRUD.get_user_contracts(db=session, user=default_user, params=ContractListParams(page_size=2))
+    assert [contract.contract_id for contract in first.items] == newest_first[:2]
+    assert first.items[0].loan.risk_score == 7
+    assert first.items[0].investor_user.user_id == default_user["user_id"]
+
+    second = await ContractCRUD.get_user_contracts(
+        db=session, user=default_user, params=ContractListParams(page_size=2, cursor=first.next_cursor)
+    )
+    assert [contract.contract_id for contract in second.items] == newest_first[2:]
+    assert second.next_cursor is None
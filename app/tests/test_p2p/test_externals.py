@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.core import http_client
+from app.core.config import get_settings
+from app.main import app
+from app.services import chatbot, stock_summary
+from app.services.stock_summary import StockSummaryCache
+
+
+@pytest.fixture(name="upstream_requests")
+def fixture_upstream_requests():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/FAIL"):
+            return httpx.Response(502, json={"detail": "bad gateway"})
+        return httpx.Response(200, json={"symbol": request.url.path.rsplit("/", 1)[-1]})
+
+    http_client.set_transport(httpx.MockTransport(handler))
+    yield requests
+    http_client.set_transport(None)
+
+
+@pytest.mark.asyncio
+async def test_get_stock_data_uses_shared_client(client: AsyncClient, upstream_requests: list) -> None:
+    response = await client.get(app.url_path_for("get_stock_data", symbol="PETR4"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["response"] == {"symbol": "PETR4"}
+    assert upstream_requests[0].url.path == "/api/stocks/stock-summary/PETR4"
+
+
+@pytest.mark.asyncio
+async def test_get_stock_data_upstream_error(client: AsyncClient, upstream_requests: list) -> None:
+    response = await client.get(app.url_path_for("get_stock_data", symbol="FAIL"))
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_get_stock_data_is_cached(client: AsyncClient, upstream_requests: list) -> None:
+    for _ in range(3):
+        response = await client.get(app.url_path_for("get_stock_data", symbol="PETR4"))
+        assert response.json()["response"] == {"symbol": "PETR4"}
+
+    assert len(upstream_requests) == 1
+    stats = (await client.get(app.url_path_for("get_stock_stats"))).json()
+    assert (stats["cache"]["hits"], stats["cache"]["misses"]) == (2, 1)
+    assert stats["upstream"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_stock_data_serves_stale_while_revalidating(client: AsyncClient, upstream_requests: list) -> None:
+    get_settings().stocks.summary_ttl_secs = 0
+
+    await client.get(app.url_path_for("get_stock_data", symbol="VALE3"))
+    response = await client.get(app.url_path_for("get_stock_data", symbol="VALE3"))
+    assert response.json()["response"] == {"symbol": "VALE3"}
+    await asyncio.gather(*stock_summary._REFRESH_TASKS)
+
+    assert len(upstream_requests) == 2
+    assert StockSummaryCache.stats()["cache"]["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_stock_data_batch(client: AsyncClient, upstream_requests: list) -> None:
+    response = await client.post(
+        app.url_path_for("get_stock_data_batch"), json={"symbols": ["PETR4", "FAIL", "PETR4", "ITUB4"]}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["response"] == {"PETR4": {"symbol": "PETR4"}, "ITUB4": {"symbol": "ITUB4"}}
+    assert list(body["errors"]) == ["FAIL"]
+    # the failing GET is retried before giving up
+    assert len(upstream_requests) == 2 + get_settings().http.retry_max_attempts
+
+    response = await client.post(app.url_path_for("get_stock_data_batch"), json={"symbols": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("symbol", ["../../admin", "A?x=1", "A/B", "", "A" * 17])
+async def test_get_stock_data_rejects_symbols_outside_the_ticker_charset(
+    client: AsyncClient, upstream_requests: list, symbol: str
+) -> None:
+    response = await client.post(app.url_path_for("get_stock_data_batch"), json={"symbols": ["PETR4", symbol]})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    if symbol and "/" not in symbol:
+        response = await client.get(app.url_path_for("get_stock_data", symbol=symbol).replace("?", "%3F"))
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    assert upstream_requests == []
+
+
+@pytest.fixture(name="fake_openai")
+def fixture_fake_openai():
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        payloads.append(payload)
+        if payload["prompt"] == "FAIL":
+            return httpx.Response(429, json={"error": "rate limited"})
+        if not payload["stream"]:
+            return httpx.Response(200, json={"choices": [{"text": "Hello"}]})
+        events = [{"choices": [{"text": "Hel"}]}, {"choices": [{"text": "lo"}]}]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode(), headers={"content-type": "text/event-stream"})
+
+    http_client.set_transport(httpx.MockTransport(handler))
+    yield payloads
+    http_client.set_transport(None)
+
+
+@pytest.mark.asyncio
+async def test_send_message_to_bot_honours_request_fields(client: AsyncClient, fake_openai: list) -> None:
+    response = await client.post(
+        app.url_path_for("send_message_to_bot"),
+        json={"prompt": "hi", "model": "davinci-002", "max_tokens": 16, "temperature": 0.0},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["response"]["choices"][0]["text"] == "Hello"
+    assert fake_openai[0] == {"model": "davinci-002", "prompt": "hi", "max_tokens": 16, "temperature": 0.0, "stream": False}
+
+
+@pytest.mark.asyncio
+async def test_stream_message_to_bot_relays_sse(client: AsyncClient, fake_openai: list) -> None:
+    response = await client.post(app.url_path_for("stream_message_to_bot"), json={"prompt": "hi"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'data: {"text": "Hel"}\n\n'
+        'data: {"text": "lo"}\n\n'
+        'event: done\ndata: {}\n\n'
+    )
+    assert fake_openai[0]["stream"] is True
+    assert not chatbot._BOT_SLOTS.locked()
+
+    response = await client.post(app.url_path_for("stream_message_to_bot"), json={"prompt": "FAIL"})
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert not chatbot._BOT_SLOTS.locked()
+
+
+@pytest.mark.asyncio
+async def test_stream_message_to_bot_fails_fast_when_busy(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, fake_openai: list
+) -> None:
+    monkeypatch.setattr(chatbot, "_BOT_SLOTS", asyncio.Semaphore(0))
+
+    response = await client.post(app.url_path_for("stream_message_to_bot"), json={"prompt": "hi"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert fake_openai == []
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import Borrower, Investor
+from app.services import identity as identity_service
+from app.services.identity import IdentityCRUD
+
+
+@pytest.mark.asyncio
+async def test_resolve_identity_caches_roles_until_invalidated(
+    session: AsyncSession, default_user: dict, default_borrower: Borrower, default_investor: Investor
+) -> None:
+    borrower_id, investor_id = default_borrower.borrower_id, default_investor.investor_id
+
+    identity = await IdentityCRUD.from_user(session, {**default_user, "is_admin": True})
+    assert (identity.borrower_id, identity.investor_id, identity.is_admin) == (borrower_id, investor_id, True)
+
+    # cached: the borrower row is gone but the hot path no longer queries it
+    await session.delete(default_borrower)
+    await session.commit()
+    cached = await IdentityCRUD.resolve(session, default_user["user_id"])
+    assert cached.borrower_id == borrower_id
+    assert cached.is_admin is False
+
+    IdentityCRUD.invalidate(default_user["user_id"])
+    refreshed = await IdentityCRUD.resolve(session, default_user["user_id"])
+    assert (refreshed.borrower_id, refreshed.investor_id) == (None, investor_id)
+
+
+@pytest.mark.asyncio
+async def test_resolve_identity_keeps_missing_role_briefly(
+    monkeypatch: pytest.MonkeyPatch, session: AsyncSession, default_user: dict
+) -> None:
+    ttls = []
+    original_set = identity_service._IDENTITY_CACHE.set
+    monkeypatch.setattr(
+        identity_service._IDENTITY_CACHE,
+        "set",
+        lambda key, value, ttl=None: ttls.append(ttl) or original_set(key, value, ttl),
+    )
+
+    identity = await IdentityCRUD.from_user(session, default_user)
+
+    assert (identity.borrower_id, identity.investor_id) == (None, None)
+    assert ttls == [get_settings().security.identity_missing_role_ttl_secs]
@@ -1,13 +1,16 @@
+import json
 from datetime import date
 from fastapi import HTTPException, status
 from httpx import AsyncClient
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 import pytest
-from app.models import Investor, Loan, Payment, User
-from app.schemas.requests import InvestmentRequest
+from app.core import database_session
+from app.models import Borrower, Investment, Investor, Loan, Payment, RiskProfile, User
+from app.schemas.requests import InvestmentListParams, InvestmentRequest, InvestmentSortEnum
 from app.schemas.responses import InvestmentResponse
 from app.services.crud_investment import InvestmentCRUD
+from app.main import app
 
 @pytest.mark.asyncio
 async def test_create_investment(
@@ -33,13 +36,41 @@ async def test_create_investment(
     assert investment_response.amount == investment_request.amount
 
 
+@pytest.mark.asyncio
+async def test_create_investment_reserves_loan_once(
+    session: AsyncSession,
+    default_user: User,
+    default_loan: Loan,
+    default_investor: Investor
+) -> None:
+    loan_id = default_loan.loan_id
+    investment_request = InvestmentRequest(loan_id=loan_id, amount=5000.0)
+
+    first = await InvestmentCRUD.create_investment(
+        db=session, investment_in=investment_request, user=default_user, idempotency_key="retry-1"
+    )
+    retried = await InvestmentCRUD.create_investment(
+        db=session, investment_in=investment_request, user=default_user, idempotency_key="retry-1"
+    )
+    assert retried.investment_id == first.investment_id
+
+    with pytest.raises(HTTPException) as exc_info:
+        await InvestmentCRUD.create_investment(db=session, investment_in=investment_request, user=default_user)
+    assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+    investment_count = await session.scalar(select(func.count()).where(Investment.loan_id == loan_id))
+    loan_status = await session.scalar(select(Loan.status).where(Loan.loan_id == loan_id))
+    assert investment_count == 1
+    assert loan_status == "solicited"
+
+
 @pytest.mark.asyncio
 async def test_generate_payments(
     session: AsyncSession,
     default_loan: Loan
 ) -> None:
     
-    await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=5000.0)
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=5000.0)
 
     payments = await session.execute(
         select(Payment).where(Payment.loan_id == default_loan.loan_id)
@@ -47,7 +78,172 @@ async def test_generate_payments(
     generated_payments = payments.fetchall()
 
     assert len(generated_payments) == default_loan.duration
+    assert sorted(payment_ids) == sorted(payment[0].payment_id for payment in generated_payments)
 
     for payment in generated_payments:
         assert payment[0].amount > 0
-        assert payment[0].status == "pending"
\ No newline at end of file
+        assert payment[0].status == "pending"
+        assert payment[0].status_payment_investor == "pending"
+
+    installments = sorted((payment[0] for payment in generated_payments), key=lambda payment: payment.installment_number)
+    assert installments[0].interest > installments[-1].interest
+    assert sum(payment.principal for payment in installments) == pytest.approx(5000.0)
+
+
+@pytest.mark.asyncio
+async def test_admin_investment_lists_filter_and_sort(
+    session: AsyncSession,
+    default_user: User,
+    default_borrower: Borrower,
+    default_investor: Investor
+) -> None:
+    session.add(RiskProfile(borrower_id=default_borrower.borrower_id, risk_score=7))
+    loans = {}
+    for status_name, amount in (("payed", 1000.0), ("approved", 2000.0), ("payed", 3000.0)):
+        loan = Loan(
+            borrower_id=default_borrower.borrower_id,
+            amount=amount,
+            interest_rate=2.0,
+            duration=2,
+            status=status_name,
+            goals="compras",
+        )
+        session.add(loan)
+        await session.flush()
+        session.add(Investment(loan_id=loan.loan_id, investor_id=default_investor.investor_id, amount=amount))
+        loans[amount] = loan.loan_id
+    await session.commit()
+
+    # only the first payed loan still owes a payout to the investor
+    for loan_amount in (1000.0, 3000.0):
+        await InvestmentCRUD.generate_payments(db=session, loan=await session.get(Loan, loans[loan_amount]), investment_amount=loan_amount)
+    await session.execute(
+        Payment.__table__.update().where(Payment.loan_id == loans[3000.0]).values(status_payment_investor="payed")
+    )
+    await session.commit()
+
+    payed = await InvestmentCRUD.list_investments_payed(db=session)
+    assert [investment.loan.loan_id for investment in payed] == [loans[1000.0]]
+    assert payed[0].loan.risk_score == 7
+    assert payed[0].investor.user_id == default_user["user_id"]
+
+    approved = await InvestmentCRUD.list_investment_status_approved(db=session)
+    assert [investment.amount for investment in approved] == [2000.0]
+
+    page = await InvestmentCRUD.list_investments(
+        db=session, params=InvestmentListParams(sort=InvestmentSortEnum.loan_amount, descending=True, limit=2)
+    )
+    assert [investment.loan.amount for investment in page] == [3000.0, 2000.0]
+
+
+@pytest.mark.asyncio
+async def test_list_investments_streams_ndjson(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_borrower: Borrower,
+    default_investor: Investor,
+    default_loan: Loan,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session.add(RiskProfile(borrower_id=default_borrower.borrower_id, risk_score=3))
+    session.add(Investment(loan_id=default_loan.loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    await session.commit()
+    opened = []
+    monkeypatch.setattr(database_session, "get_async_session", lambda: opened.append(session) or session)
+
+    response = await client.get(
+        app.url_path_for("list_investments"), headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    # only the stream's own session, the route does not resolve a second one
+    assert len(opened) == 1
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["amount"] == 10000.0
+    assert lines[0]["loan"]["risk_score"] == 3
+    assert lines[0]["investor"]["user_id"] == authenticated_admin["user_id"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+async def test_get_user_portfolio_summary(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_borrower: Borrower,
+    default_investor: Investor,
+    default_loan: Loan
+) -> None:
+    approved_loan = Loan(
+        borrower_id=default_borrower.borrower_id,
+        amount=2000.0,
+        interest_rate=2.0,
+        duration=6,
+        status="approved",
+        goals="viagem",
+        investor_profit=100.0,
+    )
+    session.add(approved_loan)
+    await session.flush()
+    session.add(Investment(loan_id=default_loan.loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    session.add(Investment(loan_id=approved_loan.loan_id, investor_id=default_investor.investor_id, amount=2000.0))
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(
+        update(Payment).where(Payment.payment_id == payment_ids[0]).values(status="payed", status_payment_investor="payed")
+    )
+    await session.commit()
+    payments = (await session.scalars(select(Payment).where(Payment.payment_id.in_(payment_ids)))).all()
+    payouts = {payment.payment_id: payment.amount - payment.bank_profit for payment in payments}
+    next_due_date = min(payment.due_date for payment in payments if payment.status == "pending")
+
+    response = await client.get(app.url_path_for("get_user_portfolio_summary"))
+
+    assert response.status_code == status.HTTP_200_OK
+    summary = response.json()
+    assert summary["investments"] == 2
+    assert summary["invested_principal"] == 12000.0
+    assert summary["expected_profit"] == pytest.approx(300.0 + 100.0)
+    assert summary["received_payouts"] == pytest.approx(payouts[payment_ids[0]])
+    assert summary["pending_payouts"] == pytest.approx(sum(payouts.values()) - payouts[payment_ids[0]])
+    assert summary["next_due_date"] == next_due_date.isoformat()
+    assert [(item["status"], item["investments"]) for item in summary["by_loan_status"]] == [("approved", 1), ("pending", 1)]
+
+
+@pytest.mark.asyncio
+async def test_get_user_portfolio_summary_next_due_date_includes_overdue(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_investor: Investor,
+    default_loan: Loan
+) -> None:
+    session.add(Investment(loan_id=default_loan.loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[0]).values(status="payed"))
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[1]).values(status="overdue"))
+    await session.commit()
+    overdue_due_date = await session.scalar(select(Payment.due_date).where(Payment.payment_id == payment_ids[1]))
+
+    response = await client.get(app.url_path_for("get_user_portfolio_summary"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next_due_date"] == overdue_due_date.isoformat()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+async def test_get_user_portfolio_summary_without_investments(
+    client: AsyncClient,
+    authenticated_admin: dict,
+    default_investor: Investor
+) -> None:
+    response = await client.get(app.url_path_for("get_user_portfolio_summary"))
+
+    assert response.status_code == status.HTTP_200_OK
+    summary = response.json()
+    assert (summary["investments"], summary["received_payouts"], summary["pending_payouts"]) == (0, 0.0, 0.0)
+    assert summary["next_due_date"] is None
+    assert summary["by_loan_status"] == []
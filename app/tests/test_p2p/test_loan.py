@@ -4,9 +4,12 @@ from httpx import AsyncClient
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import pytest
-from app.models import Loan, RiskProfile, User, Borrower
-from app.schemas.requests import LoanRequest, LoanUpdateRequest
-from app.schemas.responses import LoanResponse
+from pydantic import TypeAdapter
+from app.helpers.pagination import encode_cursor
+from app.main import app
+from app.models import Contract, Investment, Investor, Loan, Payment, RiskProfile, User, Borrower
+from app.schemas.requests import LoanListParams, LoanRequest, LoanStatusEnum, LoanUpdateRequest
+from app.schemas.responses import LoanResponse, LoanResponsePersonalizated
 from app.services.p2p import LoanCRUD
 
 
@@ -77,8 +80,9 @@ async def test_list_loans(session: AsyncSession, default_user: User, default_bor
     
     loans = await LoanCRUD.list_loans(db=session)
 
-    assert len(loans) == 1
-    loan_response = loans[0]
+    assert len(loans.items) == 1
+    assert loans.next_cursor is None
+    loan_response = loans.items[0]
     assert loan_response.loan_id == default_loan.loan_id
     assert loan_response.borrower_id == default_borrower.borrower_id
     assert loan_response.amount == default_loan.amount
@@ -89,6 +93,93 @@ async def test_list_loans(session: AsyncSession, default_user: User, default_bor
     assert loan_response.risk_score == 5
     assert loan_response.user.user_id == default_user["user_id"]
 
+@pytest.mark.asyncio
+async def test_list_loans_keyset_pagination(session: AsyncSession, default_borrower: Borrower, default_loan: Loan) -> None:
+    session.add(RiskProfile(borrower_id=default_borrower.borrower_id, risk_score=5))
+    for amount in (2000.0, 3000.0):
+        session.add(Loan(
+            borrower_id=default_borrower.borrower_id,
+            amount=amount,
+            interest_rate=2.0,
+            duration=6,
+            status="approved",
+            goals="viagem",
+        ))
+    await session.commit()
+
+    first_page = await LoanCRUD.list_loans(db=session, params=LoanListParams(page_size=2))
+    assert len(first_page.items) == 2
+    assert first_page.next_cursor is not None
+
+    second_page = await LoanCRUD.list_loans(
+        db=session, params=LoanListParams(page_size=2, cursor=first_page.next_cursor)
+    )
+    assert len(second_page.items) == 1
+    assert second_page.next_cursor is None
+
+    loan_ids = [loan.loan_id for loan in first_page.items + second_page.items]
+    assert sorted(loan_ids, reverse=True) == loan_ids
+    assert default_loan.loan_id in loan_ids
+
+    filtered = await LoanCRUD.list_loans(
+        db=session, params=LoanListParams(status=LoanStatusEnum.approved, min_amount=2500.0)
+    )
+    assert [loan.amount for loan in filtered.items] == [3000.0]
+
+
+@pytest.mark.asyncio
+async def test_list_loans_endpoint_serializes_page(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_borrower: Borrower,
+    default_loan: Loan
+) -> None:
+    loan_id = default_loan.loan_id
+    session.add(RiskProfile(borrower_id=default_borrower.borrower_id, risk_score=5))
+    session.add(Loan(
+        borrower_id=default_borrower.borrower_id,
+        amount=2000.0,
+        interest_rate=2.0,
+        duration=6,
+        status="approved",
+        goals="viagem",
+    ))
+    await session.commit()
+
+    response = await client.get(app.url_path_for("list_loans"), params={"page_size": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Next-Cursor"]
+    loans = TypeAdapter(list[LoanResponsePersonalizated]).validate_json(response.content)
+    assert len(loans) == 1 and loans[0].loan_id != loan_id
+    assert loans[0].user.user_id == authenticated_admin["user_id"]
+    assert loans[0].risk_score == 5
+
+
+@pytest.mark.asyncio
+async def test_list_loans_invalid_cursor(session: AsyncSession) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        await LoanCRUD.list_loans(db=session, params=LoanListParams(cursor="not-a-cursor"))
+
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_loans_malformed_cursor_returns_400(
+    client: AsyncClient,
+    authenticated_admin: dict
+) -> None:
+    # well-formed cursor with a string where the loan id goes
+    cursor = encode_cursor("2024-01-01T00:00:00+00:00", "abc")
+
+    response = await client.get(app.url_path_for("list_loans"), params={"cursor": cursor})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
+
+
 @pytest.mark.asyncio
 async def test_delete_loan(session: AsyncSession, default_loan: Loan) -> None:
     
@@ -146,3 +237,36 @@ async def test_update_loan_nonexistent(session: AsyncSession) -> None:
     
     assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert exc_info.value.detail == "Error updating loan"    
+
+
+@pytest.mark.asyncio
+async def test_update_loan_status_payed_settles_loan_once(
+    session: AsyncSession, default_loan: Loan, default_investor: Investor
+) -> None:
+    loan_id, duration = default_loan.loan_id, default_loan.duration
+    session.add(Investment(loan_id=loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    await session.commit()
+
+    loan_response = await LoanCRUD.update_loan_status(db=session, loan_id=loan_id, new_status=LoanStatusEnum.payed)
+    assert loan_response.status == LoanStatusEnum.payed.value
+
+    with pytest.raises(HTTPException) as exc_info:
+        await LoanCRUD.update_loan_status(db=session, loan_id=loan_id, new_status=LoanStatusEnum.payed)
+    assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+
+    contract_count = await session.scalar(select(func.count()).where(Contract.loan_id == loan_id))
+    payment_count = await session.scalar(select(func.count()).where(Payment.loan_id == loan_id))
+    assert contract_count == 1
+    assert payment_count == duration
+
+
+@pytest.mark.asyncio
+async def test_update_loan_status_payed_without_investment_rolls_back(session: AsyncSession, default_loan: Loan) -> None:
+    loan_id = default_loan.loan_id
+
+    with pytest.raises(HTTPException) as exc_info:
+        await LoanCRUD.update_loan_status(db=session, loan_id=loan_id, new_status=LoanStatusEnum.payed)
+    assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+    loan_status = await session.scalar(select(Loan.status).where(Loan.loan_id == loan_id))
+    assert loan_status == "pending"
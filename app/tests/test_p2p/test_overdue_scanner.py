@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Loan, LoanDelinquency, Payment
+from app.services.crud_investment import InvestmentCRUD
+from app.services.overdue_scanner import OverdueScanner
+
+
+@pytest.mark.asyncio
+async def test_overdue_scanner_marks_past_due_and_ages_per_loan(session: AsyncSession, default_loan: Loan) -> None:
+    loan_id = default_loan.loan_id
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=12000.0)
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[0]).values(status="payed"))
+    await session.commit()
+    payments = {
+        payment.payment_id: payment
+        for payment in await session.scalars(select(Payment).where(Payment.loan_id == loan_id))
+    }
+    due_dates = [payments[payment_id].due_date for payment_id in payment_ids]
+    amounts = [payments[payment_id].amount for payment_id in payment_ids]
+
+    # 45 days after the 4th due date: 2nd and 3rd are 61+ days late, 4th is 45 days late
+    scanner = OverdueScanner(batch_size=2)
+    now = due_dates[3] + timedelta(days=45)
+    assert await scanner.scan(session, now) == len([due for due in due_dates[1:] if due < now])
+
+    statuses = dict((await session.execute(select(Payment.payment_id, Payment.status).where(Payment.loan_id == loan_id))).all())
+    assert statuses[payment_ids[0]] == "payed"
+    assert [statuses[payment_id] for payment_id in payment_ids[1:5]] == ["overdue"] * 4
+    assert statuses[payment_ids[5]] == "pending"
+
+    aging = await session.scalar(select(LoanDelinquency).where(LoanDelinquency.loan_id == loan_id))
+    assert aging.overdue_installments == 4
+    assert aging.oldest_due_date == due_dates[1]
+    assert aging.amount_1_30 == pytest.approx(amounts[4])
+    assert aging.amount_31_60 == pytest.approx(amounts[3])
+    assert aging.amount_61_90 == pytest.approx(amounts[2])
+    assert aging.amount_90_plus == pytest.approx(amounts[1])
+
+    # nothing left to mark; an installment moved back to pending is marked again
+    assert await scanner.scan(session, now) == 0
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[2]).values(status="pending"))
+    await session.commit()
+    assert await scanner.scan(session, now) == 1
+
+    # settled loans leave the aging table
+    await session.execute(update(Payment).where(Payment.payment_id.in_(payment_ids[1:5])).values(status="payed"))
+    await session.commit()
+    await scanner.scan(session, now)
+    assert await session.scalar(select(LoanDelinquency).where(LoanDelinquency.loan_id == loan_id)) is None
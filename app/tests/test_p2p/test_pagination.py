@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import AwareDatetime, NaiveDatetime
+
+from app.helpers.pagination import decode_cursor, encode_cursor
+
+
+def test_decode_cursor_round_trip():
+    due_date = datetime(2024, 1, 1, 12, 30)
+    created = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(due_date, 42), NaiveDatetime, int) == [due_date, 42]
+    assert decode_cursor(encode_cursor(created, 42), AwareDatetime, int) == [created, 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        encode_cursor("2024-01-01T00:00:00"),
+        encode_cursor("2024-01-01T00:00:00", 1, 2),
+        encode_cursor("2024-01-01T00:00:00", "abc"),
+        encode_cursor("2024-01-01T00:00:00", 1.5),
+        encode_cursor("2024-01-01T00:00:00", True),
+        encode_cursor("yesterday", 1),
+        encode_cursor(1, 1),
+        encode_cursor(None, 1),
+        # naive key column: a timestamp with an offset cannot be compared to it
+        encode_cursor("2024-01-01T00:00:00+00:00", 1),
+    ],
+)
+def test_decode_cursor_rejects_malformed_values(cursor: str):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, NaiveDatetime, int)
+
+
+def test_decode_cursor_requires_offset_for_aware_columns():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("2024-01-01T00:00:00", 1), AwareDatetime, int)
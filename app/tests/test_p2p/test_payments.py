@@ -0,0 +1,214 @@
+import json
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.main import app
+from app.models import Borrower, Investment, Investor, Loan, Payment
+from app.schemas.requests import PaymentBulkUpdateRequest, PaymentHistoryParams
+from app.schemas.responses import PaymentBulkOutcomeEnum
+from app.services.crud_investment import InvestmentCRUD
+from app.services.crud_payments import PaymentCRUD
+
+
+@pytest.mark.asyncio
+async def test_get_investor_pending_payments_streams_ndjson(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_investor: Investor,
+    default_loan: Loan
+) -> None:
+    loan_id = default_loan.loan_id
+    session.add(Investment(loan_id=loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(update(Payment).where(Payment.payment_id.in_(payment_ids[:2])).values(status="payed"))
+    await session.commit()
+
+    response = await client.get(
+        app.url_path_for("get_investor_pending_payments"), headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["payment_id"] for line in lines) == sorted(payment_ids[:2])
+    assert all(line["investment"]["loan_id"] == loan_id for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_get_user_payments_investor_pages_by_due_date(
+    session: AsyncSession,
+    default_user: dict,
+    default_investor: Investor,
+    default_loan: Loan
+) -> None:
+    session.add(Investment(loan_id=default_loan.loan_id, investor_id=default_investor.investor_id, amount=10000.0))
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[0]).values(status="payed"))
+    await session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = await PaymentCRUD.get_user_payments_investor(
+            session, default_user, params=PaymentHistoryParams(page_size=5, cursor=cursor)
+        )
+        seen += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert [payment.payment_id for payment in seen] == payment_ids
+    assert [payment.due_date for payment in seen] == sorted(payment.due_date for payment in seen)
+
+    pending = await PaymentCRUD.get_user_payments_investor(
+        session, default_user, params=PaymentHistoryParams(status="pending", due_to=seen[2].due_date)
+    )
+    assert [payment.payment_id for payment in pending.items] == payment_ids[1:3]
+
+
+@pytest.mark.asyncio
+async def test_list_user_payments_borrower_returns_next_cursor(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_borrower: Borrower,
+    default_loan: Loan
+) -> None:
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+
+    response = await client.get(app.url_path_for("list_user_payments_borrower"), params={"page_size": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [payment["payment_id"] for payment in response.json()] == payment_ids[:2]
+
+    response = await client.get(
+        app.url_path_for("list_user_payments_borrower"),
+        params={"page_size": 2, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert [payment["payment_id"] for payment in response.json()] == payment_ids[2:4]
+
+
+@pytest.mark.asyncio
+async def test_list_user_payments_borrower_accepts_utc_due_from(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_borrower: Borrower,
+    default_loan: Loan
+) -> None:
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    due_dates = (await session.scalars(select(Payment.due_date).where(Payment.payment_id.in_(payment_ids)))).all()
+    due_from = sorted(due_dates)[2].isoformat() + "Z"
+
+    response = await client.get(
+        app.url_path_for("list_user_payments_borrower"), params={"due_from": due_from, "page_size": 100}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [payment["payment_id"] for payment in response.json()] == payment_ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_payment_status_reports_each_id(
+    session: AsyncSession,
+    default_loan: Loan
+) -> None:
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(update(Payment).where(Payment.payment_id == payment_ids[0]).values(status="payed"))
+    await session.commit()
+    missing_id = max(payment_ids) + 1000
+
+    response = await PaymentCRUD.bulk_update_payment_status(
+        session, PaymentBulkUpdateRequest(status="payed", payment_ids=[*payment_ids[:3], missing_id])
+    )
+
+    assert (response.updated, response.already_in_state, response.not_found) == (2, 1, 1)
+    outcomes = {result.payment_id: result.outcome for result in response.results}
+    assert outcomes == {
+        payment_ids[0]: PaymentBulkOutcomeEnum.already_in_state,
+        payment_ids[1]: PaymentBulkOutcomeEnum.updated,
+        payment_ids[2]: PaymentBulkOutcomeEnum.updated,
+        missing_id: PaymentBulkOutcomeEnum.not_found,
+    }
+    statuses = await session.scalars(select(Payment.status).where(Payment.payment_id.in_(payment_ids)))
+    assert sorted(statuses) == ["payed"] * 3 + ["pending"] * (len(payment_ids) - 3)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_payment_investor_status_by_filter(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_loan: Loan
+) -> None:
+    loan_id = default_loan.loan_id
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    await session.execute(update(Payment).where(Payment.payment_id.in_(payment_ids[:4])).values(status="payed"))
+    await session.commit()
+
+    response = await client.patch(
+        app.url_path_for("bulk_update_payment_investor_status"),
+        json={"status": "payed", "filter": {"loan_id": loan_id, "status": "payed"}},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["updated"] == 4
+    assert [result["payment_id"] for result in body["results"]] == payment_ids[:4]
+    assert all(result["previous_status"] == "pending" for result in body["results"])
+
+    response = await client.patch(app.url_path_for("bulk_update_payment_status"), json={"status": "payed", "filter": {}})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_filter_over_the_cap_changes_nothing(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_loan: Loan,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    loan_id = default_loan.loan_id
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    monkeypatch.setattr("app.services.crud_payments.BULK_MAX_PAYMENT_IDS", len(payment_ids) - 1)
+
+    response = await client.patch(
+        app.url_path_for("bulk_update_payment_status"),
+        json={"status": "payed", "filter": {"loan_id": loan_id}},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    statuses = await session.scalars(select(Payment.status).where(Payment.loan_id == loan_id))
+    assert set(statuses) == {"pending"}
+
+    monkeypatch.setattr("app.services.crud_payments.BULK_MAX_PAYMENT_IDS", len(payment_ids))
+    response = await client.patch(
+        app.url_path_for("bulk_update_payment_status"),
+        json={"status": "payed", "filter": {"loan_id": loan_id}},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["updated"] == len(payment_ids)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_utc_due_before(
+    client: AsyncClient,
+    session: AsyncSession,
+    authenticated_admin: dict,
+    default_loan: Loan
+) -> None:
+    payment_ids = await InvestmentCRUD.generate_payments(db=session, loan=default_loan, investment_amount=10000.0)
+    due_dates = sorted((await session.scalars(select(Payment.due_date).where(Payment.payment_id.in_(payment_ids)))).all())
+
+    response = await client.patch(
+        app.url_path_for("bulk_update_payment_status"),
+        json={"status": "payed", "filter": {"loan_id": default_loan.loan_id, "due_before": due_dates[2].isoformat() + "Z"}},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["payment_id"] for result in response.json()["results"]] == payment_ids[:2]
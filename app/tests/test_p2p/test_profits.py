@@ -1,6 +1,8 @@
 import pytest
+from datetime import datetime
 from math import pow
-from app.helpers.p2p_utils import ProfitCalculator
+import numpy as np
+from app.helpers.p2p_utils import BATCH_RELATIVE_TOLERANCE, ProfitCalculator, monthly_due_dates
 
 @pytest.mark.asyncio
 async def test_calculate_profits():
@@ -20,4 +22,37 @@ async def test_calculate_profits():
 
     assert bank_profit == expected_bank_profit
     assert investor_profit == expected_investor_profit
-    assert monthly_payment == expected_monthly_payment
\ No newline at end of file
+    assert monthly_payment == expected_monthly_payment
+
+
+def test_monthly_due_dates_are_calendar_months():
+    due_dates = monthly_due_dates(datetime(2024, 1, 31, 10, 0), 4)
+
+    assert due_dates == [
+        datetime(2024, 2, 29, 10, 0),
+        datetime(2024, 3, 31, 10, 0),
+        datetime(2024, 4, 30, 10, 0),
+        datetime(2024, 5, 31, 10, 0),
+    ]
+
+
+def test_calculate_profits_zero_interest():
+    bank_profit, investor_profit, monthly_payment = ProfitCalculator.calculate_profits(1200.0, 0.0, 12)
+
+    assert monthly_payment == 100.0
+    assert bank_profit == 0.0
+    assert investor_profit == 0.0
+
+
+def test_calculate_profits_batch_matches_scalar():
+    amounts = [10000.0, 2500.0, 1200.0, 50000.0]
+    rates = [5.0, 1.25, 0.0, 2.0]
+    durations = [12, 6, 12, 120]
+
+    batch = ProfitCalculator.calculate_profits_batch(amounts, rates, durations)
+    expected = np.array([
+        ProfitCalculator.calculate_profits(amount, rate, duration)
+        for amount, rate, duration in zip(amounts, rates, durations)
+    ]).T
+
+    np.testing.assert_allclose(batch, expected, rtol=BATCH_RELATIVE_TOLERANCE)
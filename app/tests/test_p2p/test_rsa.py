@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa as rsa_keys
+from fastapi import status
+from httpx import AsyncClient
+
+from app.helpers import rsa
+from app.helpers.cache import TTLCache
+from app.main import app
+
+
+@pytest.fixture(name="key_pair", scope="module")
+def fixture_key_pair() -> tuple[str, str]:
+    private_key = rsa_keys.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return public_pem, private_pem
+
+
+@pytest.fixture(autouse=True)
+def fixture_clean_key_cache():
+    yield
+    rsa.clear_key_cache()
+
+
+def test_rsa_round_trip_parses_each_key_once(monkeypatch: pytest.MonkeyPatch, key_pair: tuple[str, str]) -> None:
+    public_pem, private_pem = key_pair
+    loads = []
+    original_load = rsa.load_pem_public_key
+    monkeypatch.setattr(rsa, "load_pem_public_key", lambda data: loads.append(data) or original_load(data))
+
+    ciphertexts = rsa.encrypt_many(["olá", "mundo"], public_pem) + [rsa.encrypt("olá", public_pem)]
+
+    assert len(loads) == 1
+    assert ciphertexts[0] != ciphertexts[2]  # OAEP is randomized
+    assert [rsa.decrypt(ciphertext, private_pem) for ciphertext in ciphertexts] == ["olá", "mundo", "olá"]
+
+
+def test_rsa_key_cache_is_safe_across_threads(monkeypatch: pytest.MonkeyPatch, key_pair: tuple[str, str]) -> None:
+    public_pem, _ = key_pair
+    # Quatro entradas distintas no cache para a mesma chave (impressão digital pelo tamanho
+    # do PEM); cache pequeno e TTL curto forçam descarte e expiração concorrentes
+    pems = [public_pem + "\n" * spaces for spaces in range(1, 5)]
+    monkeypatch.setattr(rsa, "key_fingerprint", lambda pem: str(len(pem)))
+
+    def yielding_timer() -> float:
+        # Cede a vez a outra thread no meio das operações do cache
+        time.sleep(0)
+        return time.monotonic()
+
+    monkeypatch.setattr(rsa, "_KEY_CACHE", TTLCache(max_size=2, ttl=0.0001, timer=yielding_timer))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        keys = list(executor.map(rsa.load_public_key, pems * 500))
+
+    assert all(isinstance(key, rsa.rsa.RSAPublicKey) for key in keys)
+
+
+def test_rsa_rejects_bad_input(key_pair: tuple[str, str]) -> None:
+    public_pem, private_pem = key_pair
+
+    with pytest.raises(rsa.RSAError):
+        rsa.encrypt("hi", "not a key")
+    with pytest.raises(rsa.RSAError):
+        rsa.encrypt("x" * 191, public_pem)
+    with pytest.raises(rsa.RSAError):
+        rsa.decrypt(rsa.encrypt("hi", public_pem)[:-4], private_pem)
+
+
+@pytest.mark.asyncio
+async def test_rsa_endpoints(client: AsyncClient, key_pair: tuple[str, str]) -> None:
+    public_pem, private_pem = key_pair
+
+    response = await client.post(
+        app.url_path_for("encrypt_rsa_batch"), json={"messages": ["a", "b"], "public_key": public_pem}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    first, second = response.json()["response"]["messages"]
+
+    response = await client.post(app.url_path_for("decrypt_rsa_message"), json={"message": second, "private_key": private_pem})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["response"] == {"message": "b"}
+
+    response = await client.post(app.url_path_for("generate_rsa_keys"), json={"message": "a", "public_key": "nope"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,44 @@
+# Micro-benchmark: scalar ProfitCalculator.calculate_profits in a Python loop
+# versus the vectorized ProfitCalculator.calculate_profits_batch.
+#
+# python -m benchmarks.bench_profit_calculator [size]
+
+
+import sys
+import timeit
+
+import numpy as np
+
+from app.helpers.p2p_utils import BATCH_RELATIVE_TOLERANCE, ProfitCalculator
+
+
+def main(size: int = 100_000) -> None:
+    rng = np.random.default_rng(42)
+    amounts = rng.uniform(1_000, 100_000, size)
+    rates = rng.uniform(0, 5, size).round(2)
+    durations = rng.integers(1, 120, size)
+
+    def scalar():
+        return [
+            ProfitCalculator.calculate_profits(amount, rate, int(duration))
+            for amount, rate, duration in zip(amounts.tolist(), rates.tolist(), durations.tolist())
+        ]
+
+    def batch():
+        return ProfitCalculator.calculate_profits_batch(amounts, rates, durations)
+
+    expected = np.array(scalar()).T
+    np.testing.assert_allclose(batch(), expected, rtol=BATCH_RELATIVE_TOLERANCE)
+
+    repeat = 5
+    scalar_secs = min(timeit.repeat(scalar, number=1, repeat=repeat))
+    batch_secs = min(timeit.repeat(batch, number=1, repeat=repeat))
+
+    print(f"loans: {size}")
+    print(f"scalar loop: {scalar_secs * 1e3:10.2f} ms  ({scalar_secs / size * 1e9:8.1f} ns/loan)")
+    print(f"batch:       {batch_secs * 1e3:10.2f} ms  ({batch_secs / size * 1e9:8.1f} ns/loan)")
+    print(f"speedup:     {scalar_secs / batch_secs:10.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,124 @@
+# Micro-benchmark: per-row cost of the `/loans` and `/investments` list
+# responses, before and after the serialization fast path.
+#
+# before: nested response models built with validation, then FastAPI's
+#         `serialize_response` against `response_model` and `JSONResponse`.
+# after:  the services' row converters emit plain dicts, validated in one
+#         TypeAdapter call (`validate_list`) and written with `dump_json_list`.
+#
+# "before" starts from already extracted field values while "after" also reads
+# the row attributes, so the reported speedup is a lower bound.
+#
+# python -m benchmarks.bench_serialization [size]
+
+
+import asyncio
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.helpers.serialization import dump_json_list, validate_list
+from app.schemas.responses import InvestmentResponseDetailed, LoanResponsePersonalizated
+from app.services.crud_investment import InvestmentCRUD
+from app.services.p2p import LoanCRUD
+
+
+def loan_rows(size: int) -> list:
+    return [
+        SimpleNamespace(
+            Loan=SimpleNamespace(
+                loan_id=i,
+                borrower_id=i,
+                amount=1000.0 + i,
+                interest_rate=2.5,
+                duration=12,
+                status="pending",
+                goals="viagem",
+                investor_profit=123.45,
+                create_time=datetime(2026, 1, 1),
+            ),
+            User=SimpleNamespace(user_id=str(uuid.uuid4()), name=f"user {i}", email=f"user{i}@example.com", cpf="12345678901"),
+            RiskProfile=SimpleNamespace(risk_score=i % 100),
+        )
+        for i in range(size)
+    ]
+
+
+def investment_rows(size: int) -> list:
+    return [
+        SimpleNamespace(
+            investment_id=i,
+            amount=500.0 + i,
+            loan_id=i,
+            borrower_id=i,
+            loan_amount=1000.0 + i,
+            interest_rate=2.5,
+            duration=12,
+            status="approved",
+            goals="negocios",
+            investor_profit=123.45,
+            risk_score=i % 100,
+            borrower_user_id=str(uuid.uuid4()),
+            borrower_name=f"borrower {i}",
+            borrower_email=f"borrower{i}@example.com",
+            borrower_cpf="12345678901",
+            investor_user_id=str(uuid.uuid4()),
+            investor_name=f"investor {i}",
+            investor_email=f"investor{i}@example.com",
+            investor_cpf="10987654321",
+        )
+        for i in range(size)
+    ]
+
+
+def validated(item: BaseModel) -> BaseModel:
+    # Same nested `Model(**fields)` calls the services made before the fast path
+    return type(item)(**{
+        name: validated(value) if isinstance(value, BaseModel) else value
+        for name, value in item.__dict__.items()
+    })
+
+
+def bench(name: str, model: type[BaseModel], rows: list, fields_from_row) -> None:
+    field = create_response_field(name=f"Response_{name}", type_=List[model], mode="serialization")
+    models = validate_list(model, (fields_from_row(row) for row in rows))
+    loop = asyncio.new_event_loop()
+
+    def before():
+        items = [validated(item) for item in models]
+        content = loop.run_until_complete(serialize_response(field=field, response_content=items))
+        return JSONResponse(content).body
+
+    def after():
+        return dump_json_list(model, validate_list(model, (fields_from_row(row) for row in rows)))
+
+    assert json.loads(before()) == json.loads(after())
+
+    repeat = 5
+    before_secs = min(timeit.repeat(before, number=1, repeat=repeat))
+    after_secs = min(timeit.repeat(after, number=1, repeat=repeat))
+    loop.close()
+
+    size = len(rows)
+    print(f"{name}: {size} rows")
+    print(f"  before: {before_secs * 1e3:10.2f} ms  ({before_secs / size * 1e6:8.2f} us/row)")
+    print(f"  after:  {after_secs * 1e3:10.2f} ms  ({after_secs / size * 1e6:8.2f} us/row)")
+    print(f"  speedup: {before_secs / after_secs:9.1f}x")
+
+
+def main(size: int = 10_000) -> None:
+    bench("/loans", LoanResponsePersonalizated, loan_rows(size), LoanCRUD._loan_fields)
+    bench("/investments", InvestmentResponseDetailed, investment_rows(size), InvestmentCRUD._investment_detailed_fields)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)